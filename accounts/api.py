@@ -1,14 +1,17 @@
-from rest_framework import viewsets, mixins, status, parsers, renderers
+from django.db import transaction
+from rest_framework import exceptions, viewsets, mixins, status
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.throttling import ScopedRateThrottle
-from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.serializers import AuthTokenSerializer
 from rest_framework.views import APIView
 
 
-from accounts.models import User
+from contratista_be import db_router
+from accounts.authentication import presented_key
+from contratista_be.mixins import ValuesListModelMixin
+from accounts.models import AuthToken, User
 from accounts.serializers import UserSerializer
 from accounts.permissions import AllowPostFromUnregisteredUser, IsOwnerOrReadOnly
 
@@ -37,15 +40,17 @@ class RegisterUserViewSet(mixins.CreateModelMixin,
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserViewSet(mixins.RetrieveModelMixin,
+class UserViewSet(ValuesListModelMixin,
+                        mixins.RetrieveModelMixin,
                         mixins.UpdateModelMixin,
                         mixins.DestroyModelMixin,
                         mixins.ListModelMixin,
                         viewsets.GenericViewSet):
     """
-    User viewset with all standard operations except POST.
+    User viewset with all standard operations except POST. Lists are
+    built from database rows rather than serializer instances.
     """
-    queryset = User.objects.all()
+    queryset = User.objects.order_by('id')
     serializer_class = UserSerializer
     lookup_field = 'username'
     permission_classes = (
@@ -57,21 +62,46 @@ class UserViewSet(mixins.RetrieveModelMixin,
 class ThrottledObtainToken(APIView):
     """
     Throttled version of rest_framework.authtoken.ObtainAuthToken
-    class.
+    class. Logging in rotates the token the client presents, if any: it
+    is revoked and replaced by a new one, leaving the user's other
+    devices logged in. DELETE revokes the token it is called with
+    (logout).
     """
     throttle_classes = (ScopedRateThrottle,)
     throttle_scope = 'authtoken'
     permission_classes = ()
-    parser_classes = (parsers.FormParser, parsers.MultiPartParser, parsers.JSONParser,)
-    renderer_classes = (renderers.JSONRenderer,)
     serializer_class = AuthTokenSerializer
 
+    def initialize_request(self, request, *args, **kwargs):
+        request = super(ThrottledObtainToken, self).initialize_request(request, *args, **kwargs)
+        # Logging in is not authenticated by the token it replaces, which
+        # may have expired or been revoked
+        if request.method == 'POST':
+            request.authenticators = ()
+        return request
+
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
-        token, created = Token.objects.get_or_create(user=user)
-        return Response({'username': user.username, 'token': token.key})
+        with transaction.atomic():
+            old_key = presented_key(request)
+            if old_key:
+                AuthToken.objects.filter(key=old_key, user=user).revoke()
+            token = AuthToken.objects.create(user=user)
+        # The client's next reads authenticate with the new token
+        db_router.pin_to_primary(token.key)
+        return Response({
+            'username': user.username,
+            'token': token.key,
+            'expires_at': token.expires_at,
+        })
+
+    def delete(self, request, *args, **kwargs):
+        if not isinstance(request.auth, AuthToken):
+            raise exceptions.NotAuthenticated()
+        AuthToken.objects.filter(pk=request.auth.pk).revoke()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 throttled_obtain_token = ThrottledObtainToken.as_view()
\ No newline at end of file
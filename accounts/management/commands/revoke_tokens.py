@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import AuthToken
+from accounts.tasks import purge_expired_tokens
+from services.models import Company
+
+
+class Command(BaseCommand):
+    help = (
+        'Revoke API tokens in bulk: those of the given users, of every vendor '
+        'in the given companies, or all expired tokens.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', dest='users', action='append', default=[], metavar='EMAIL',
+            help='Revoke the tokens of this user (repeatable)',
+        )
+        parser.add_argument(
+            '--company', dest='companies', action='append', default=[], metavar='RNC',
+            help='Revoke the tokens of every member of this company (repeatable)',
+        )
+        parser.add_argument(
+            '--expired', action='store_true',
+            help='Revoke all expired tokens',
+        )
+
+    def handle(self, *args, **options):
+        if not (options['users'] or options['companies'] or options['expired']):
+            raise CommandError('Pass at least one of --user, --company or --expired')
+
+        revoked = 0
+        if options['users']:
+            revoked += AuthToken.objects.filter(user__email__in=options['users']).revoke()
+        if options['companies']:
+            companies = Company.objects.filter(rnc__in=options['companies'])
+            revoked += AuthToken.objects.for_companies(companies).revoke()
+        if options['expired']:
+            revoked += purge_expired_tokens()
+        self.stdout.write(f'Revoked {revoked} tokens')
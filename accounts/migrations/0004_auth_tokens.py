@@ -0,0 +1,62 @@
+# Generated by Django 2.2.28 on 2026-10-19 18:50
+
+import accounts.models
+from datetime import timedelta
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def move_tokens(apps, schema_editor):
+    """
+    Carry over rest_framework.authtoken tokens so logged-in clients keep
+    working; they expire one TTL from now rather than from their issue date.
+    """
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('accounts', 'AuthToken')
+    expires_at = timezone.now() + timedelta(seconds=settings.AUTH_TOKEN_TTL)
+    AuthToken.objects.bulk_create(
+        (AuthToken(key=t.key, user_id=t.user_id, expires_at=expires_at)
+         for t in Token.objects.iterator()),
+        batch_size=1000,
+    )
+    Token.objects.all().delete()
+
+
+def restore_tokens(apps, schema_editor):
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('accounts', 'AuthToken')
+    latest = {}
+    for key, user_id in AuthToken.objects.order_by('created').values_list('key', 'user_id'):
+        latest[user_id] = key
+    Token.objects.bulk_create(
+        (Token(key=key, user_id=user_id) for user_id, key in latest.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_username'),
+        ('authtoken', '0002_auto_20160226_1747'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('key', models.CharField(default=accounts.models.generate_token_key, max_length=40, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(default=accounts.models.token_expiry)),
+                ('last_used_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='authtoken',
+            index=models.Index(fields=['expires_at'], name='accounts_token_expiry_idx'),
+        ),
+        migrations.RunPython(move_tokens, restore_tokens),
+    ]
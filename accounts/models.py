@@ -1,3 +1,6 @@
+import binascii
+import os
+from datetime import timedelta
 from django.conf import settings
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -6,15 +9,34 @@ from django.contrib.auth.models import (
     PermissionsMixin
 )
 from django.db import models
-from django.db.models.signals import post_save
-from django.dispatch import receiver
 from django.utils import timezone
-from rest_framework.authtoken.models import Token
 
-@receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def create_auth_token(sender, instance=None, created=False, **kwargs):
-    if created:
-        Token.objects.create(user=instance)
+
+def generate_token_key():
+    return binascii.hexlify(os.urandom(20)).decode()
+
+
+def token_expiry():
+    return timezone.now() + timedelta(seconds=settings.AUTH_TOKEN_TTL)
+
+
+class AuthTokenQuerySet(models.QuerySet):
+    def expired(self, now=None):
+        return self.filter(expires_at__lte=now or timezone.now())
+
+    def for_companies(self, companies):
+        """
+        Tokens of every vendor belonging to one of `companies` (instances,
+        ids or a Company queryset).
+        """
+        return self.filter(user__customer__vendor_info__company__in=companies)
+
+    def revoke(self):
+        """
+        Delete the tokens; returns how many were revoked. With no signal
+        receivers or dependent rows this is a single DELETE statement.
+        """
+        return self.delete()[0]
 
 
 class CustomUserManager(BaseUserManager):
@@ -36,6 +58,7 @@ class CustomUserManager(BaseUserManager):
 
 class User(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(blank=False, unique=True)
+    username = models.CharField(max_length=150, unique=True, blank=True, null=True)
     is_active = models.BooleanField(default=True)
     _is_vendor = models.BooleanField(default=False)
     _is_client = models.BooleanField(default=False)
@@ -45,6 +68,11 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id'], name='accounts_user_active_idx'),
+        ]
+
     def get_full_name(self):
         return self.username
 
@@ -83,3 +111,49 @@ class User(AbstractBaseUser, PermissionsMixin):
     @is_vendor.setter
     def is_vendor(self, value):
         self._is_vendor = value
+
+
+class AuthToken(models.Model):
+    """
+    Expiring replacement for rest_framework.authtoken's Token. Tokens are
+    only issued by logging in, which replaces the token the device
+    presents, so a user holds one per device until it expires or is
+    revoked, and last_used_at is refreshed at most once every
+    settings.AUTH_TOKEN_TOUCH_INTERVAL seconds rather than on every
+    request.
+    """
+    key = models.CharField(max_length=40, primary_key=True, default=generate_token_key)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='auth_tokens',
+        on_delete=models.CASCADE
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(default=token_expiry)
+    last_used_at = models.DateTimeField(blank=True, null=True)
+
+    objects = AuthTokenQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='accounts_token_expiry_idx'),
+        ]
+
+    def is_expired(self, now=None):
+        return self.expires_at <= (now or timezone.now())
+
+    def touch(self, now=None):
+        """
+        Record a use of the token, writing only when the stored timestamp
+        is older than the touch interval.
+        """
+        now = now or timezone.now()
+        interval = timedelta(seconds=settings.AUTH_TOKEN_TOUCH_INTERVAL)
+        if self.last_used_at is not None and now - self.last_used_at < interval:
+            return False
+        AuthToken.objects.filter(pk=self.pk).update(last_used_at=now)
+        self.last_used_at = now
+        return True
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.utils import timezone
+
+from .models import AuthToken
+from contratista_be.celery_app import app
+
+
+@app.task
+def purge_expired_tokens(batch_size=None):
+    """
+    Delete expired AuthTokens in batches of at most batch_size rows, each
+    in its own short transaction, so a large backlog never holds locks on
+    the table for long. Returns the number of tokens deleted.
+    """
+    batch_size = batch_size or settings.AUTH_TOKEN_PURGE_BATCH_SIZE
+    now = timezone.now()
+    purged = 0
+    while True:
+        keys = list(AuthToken.objects.expired(now).values_list('key', flat=True)[:batch_size])
+        if keys:
+            purged += AuthToken.objects.filter(key__in=keys).revoke()
+        if len(keys) < batch_size:
+            return purged
@@ -0,0 +1,33 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from accounts.serializers import UserSerializer
+
+
+class UserListTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('merida', 'elinor', 'fergus'):
+            User.objects.create_user(
+                email=f'{name}@kingdom.com',
+                password='testpassword',
+                username=name
+            )
+        User.objects.filter(username='fergus').update(is_active=False)
+
+    def test_list_matches_serializer_output(self):
+        response = self.client.get(reverse('user-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['results'],
+            UserSerializer(User.objects.order_by('id'), many=True).data
+        )
+
+    def test_list_omits_write_only_fields(self):
+        response = self.client.get(reverse('user-list'))
+        self.assertEqual(
+            sorted(response.json()['results'][0]),
+            ['id', 'is_active', 'username']
+        )
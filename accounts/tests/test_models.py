@@ -1,10 +1,12 @@
 from django.conf import settings
+from django.core.cache import cache
 from django.urls import reverse
+from django.utils import timezone
 from django.test import override_settings
-from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase, APIClient
 
-from accounts.models import User
+from accounts.models import AuthToken, User
+from contratista_be import db_router
 
 AUTH_THROTTLE_RATE = int(settings.REST_FRAMEWORK[
     'DEFAULT_THROTTLE_RATES']['authtoken'].split('/')[0])
@@ -24,21 +26,51 @@ class AccountAPITests(APITestCase):
             'email': 'merida@kingdom.com',
             'password': 'testpassword'
         }
-        cls.token1 = Token.objects.get(user_id=1)
+        cls.token1 = AuthToken.objects.create(user=user_one)
 
     def test_user_can_retrieve_token(self):
         token = str(self.token1)
         url = reverse('get-token')
-        response = self.client.post(url, data={
-            'email': self.user1['email'],
+        credentials = {
+            'username': self.user1['email'],
             'password': self.user1['password']
-        })
-        self.assertEqual(response.data['token'], token)
-    
+        }
+        response = self.client.post(url, data=credentials)
+        # A login without a token issues one and keeps the other devices'
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(self.user1['user'].auth_tokens.values_list('key', flat=True)),
+            {token, response.data['token']}
+        )
+        # Reads with the new token go to the primary until it replicates
+        self.assertTrue(cache.get(db_router.pin_key(response.data['token'])))
+
+    def test_login_rotates_the_presented_token(self):
+        url = reverse('get-token')
+        credentials = {
+            'username': self.user1['email'],
+            'password': self.user1['password']
+        }
+        other_device = self.client.post(url, data=credentials).data['token']
+        AuthToken.objects.filter(pk=self.token1.pk).update(expires_at=timezone.now())
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token1}')
+        response = self.client.post(url, data=credentials)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(self.user1['user'].auth_tokens.values_list('key', flat=True)),
+            {other_device, response.data['token']}
+        )
+        self.assertEqual(self.client.get(reverse('user-list')).status_code, 401)
+
+    def test_signup_issues_no_token(self):
+        User.objects.create_user(email='elinor@kingdom.com', password='testpassword')
+        self.assertFalse(AuthToken.objects.filter(user__email='elinor@kingdom.com').exists())
+
     def test_token_rebound_on_credential_failure(self):
         url = reverse('get-token')
         response = self.client.post(url, data={
-            'email': 'phney@email.com',
+            'username': 'phney@email.com',
             'password': 'phoneypassword'
         })
         self.assertEqual(response.status_code, 400)
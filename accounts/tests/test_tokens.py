@@ -0,0 +1,86 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from accounts.models import AuthToken, User
+from accounts.tasks import purge_expired_tokens
+from contratista_be.tests.factories import create_company, create_vendor
+
+
+class AuthTokenTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='merida@kingdom.com', password='testpassword', username='merida')
+        AuthToken.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.token = AuthToken.objects.get(user=self.user)
+
+    def get(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return self.client.get(reverse('user-detail', args=['merida']))
+
+    def test_expired_token_is_rejected(self):
+        self.assertEqual(self.get(self.token).status_code, 200)
+        AuthToken.objects.update(expires_at=timezone.now())
+        response = self.get(self.token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['detail'], 'Token has expired.')
+
+    def test_last_used_is_written_once_per_interval(self):
+        # Token lookup, last_used_at write and the user detail
+        with self.assertNumQueries(3):
+            self.get(self.token)
+        self.token.refresh_from_db()
+        first_use = self.token.last_used_at
+        self.assertIsNotNone(first_use)
+        with self.assertNumQueries(2):
+            self.get(self.token)
+
+        AuthToken.objects.update(last_used_at=first_use - timedelta(hours=1))
+        self.get(self.token)
+        self.token.refresh_from_db()
+        self.assertGreater(self.token.last_used_at, first_use)
+
+    def test_logout_revokes_only_the_callers_token(self):
+        other_device = AuthToken.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.delete(reverse('get-token'))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(list(self.user.auth_tokens.all()), [other_device])
+        self.assertEqual(self.get(self.token).status_code, 401)
+        self.assertEqual(self.get(other_device).status_code, 200)
+
+    def test_purge_expired_tokens_in_batches(self):
+        past = timezone.now() - timedelta(seconds=1)
+        AuthToken.objects.bulk_create(
+            AuthToken(user=self.user, expires_at=past) for _ in range(5))
+        self.assertEqual(purge_expired_tokens(batch_size=2), 5)
+        self.assertEqual(list(AuthToken.objects.all()), [self.token])
+
+
+class RevokeTokensCommandTests(APITestCase):
+
+    def revoke(self, *args):
+        out = StringIO()
+        call_command('revoke_tokens', *args, stdout=out)
+        return out.getvalue().strip()
+
+    def test_company_wide_revocation(self):
+        company = create_company('101000001', 'Small Builders')
+        create_vendor('a@builders.com', company=company)
+        create_vendor('b@builders.com', company=company)
+        create_vendor('c@builders.com')
+        AuthToken.objects.bulk_create(AuthToken(user=user) for user in User.objects.all())
+
+        self.assertEqual(self.revoke('--company', '101000001'), 'Revoked 2 tokens')
+        self.assertEqual(
+            sorted(AuthToken.objects.values_list('user__email', flat=True)),
+            ['c@builders.com', 'owner101000001@builders.com']
+        )
+        self.assertEqual(self.revoke('--user', 'c@builders.com'), 'Revoked 1 tokens')
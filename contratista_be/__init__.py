@@ -1,5 +1,5 @@
-from __future__ import absolute_import, unicode_literals
-
-from .celery_app import app as celery_app
-
-__all__ = ['celery_app']
+# The Celery app is deliberately not imported here, so web processes and
+# manage.py commands don't load Celery at startup. Workers and beat point
+# at the app module directly:
+#
+#     celery -A contratista_be.celery_app worker -B
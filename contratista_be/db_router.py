@@ -0,0 +1,174 @@
+"""
+Primary/replica database routing.
+
+Writes always go to the primary ('default'). Reads go to a replica listed
+in settings.DATABASE_REPLICAS only while ReplicaRoutingMiddleware is
+handling a safe-method request, so management commands, Celery tasks and
+writes' own reads stay on the primary. After an unsafe request, the
+caller (identified by the credentials of its Authorization header or its
+session cookie) is pinned to the primary for
+settings.DATABASE_REPLICA_PIN_SECONDS so it reads its own writes; so is
+a session cookie set by the response, and views that issue credentials
+pin them with pin_to_primary(). Replicas that fail a health check or lag
+more than settings.DATABASE_REPLICA_MAX_LAG seconds are skipped. Health
+checks run in a background thread, so requests never wait on a replica
+that is down. Pins live in the default cache, which must be shared by
+every worker process; check_shared_cache() fails the system checks when
+replicas are enabled on a process-local one.
+"""
+import hashlib
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.core.checks import Error, Tags, register
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Zero when the replica has replayed everything it received, otherwise
+# seconds since the last replayed transaction. NULL on a primary.
+REPLICA_LAG_SQL = (
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+# Cache backends whose entries are not seen by other processes
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+_state = threading.local()
+_health = {}
+_checks = {}
+_checks_lock = threading.Lock()
+
+
+def replica_lag(alias):
+    """
+    Replication lag of the replica in seconds, or None if it is not
+    replicating (e.g. an alias pointing at the primary itself).
+    """
+    with connections[alias].cursor() as cursor:
+        cursor.execute(REPLICA_LAG_SQL)
+        lag, = cursor.fetchone()
+    return lag
+
+
+def check_replica(alias):
+    """
+    Check whether the replica is reachable and within the allowed lag,
+    and record the result for replica_is_healthy().
+    """
+    try:
+        lag = replica_lag(alias)
+        healthy = lag is None or lag <= settings.DATABASE_REPLICA_MAX_LAG
+    except DatabaseError:
+        healthy = False
+    _health[alias] = (time.monotonic(), healthy)
+    return healthy
+
+
+def _check_in_background(alias):
+    try:
+        check_replica(alias)
+    finally:
+        connections[alias].close()
+        with _checks_lock:
+            _checks.pop(alias, None)
+
+
+def replica_is_healthy(alias):
+    """
+    The last recorded health of the replica. Results older than
+    settings.DATABASE_REPLICA_CHECK_INTERVAL are refreshed in a background
+    thread; until the first check completes the replica counts as
+    unhealthy.
+    """
+    checked = _health.get(alias)
+    if checked is None or time.monotonic() - checked[0] >= settings.DATABASE_REPLICA_CHECK_INTERVAL:
+        with _checks_lock:
+            if alias not in _checks:
+                _checks[alias] = threading.Thread(
+                    target=_check_in_background, args=(alias,),
+                    name=f'replica-check-{alias}', daemon=True)
+                _checks[alias].start()
+    return checked is not None and checked[1]
+
+
+def pin_key(identity):
+    return 'db-pin:' + hashlib.sha1(identity.encode()).hexdigest()
+
+
+def pin_to_primary(identity):
+    """
+    Send the reads of the client identified by `identity` (a token key or
+    session key) to the primary for settings.DATABASE_REPLICA_PIN_SECONDS.
+    """
+    cache.set(pin_key(identity), True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def request_identity(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if authorization:
+        return authorization[-1]
+    return request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND']
+    if settings.DATABASE_REPLICAS and backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            'Replica reads are enabled but the default cache is process-local, '
+            'so a client pinned to the primary by one worker would read a '
+            'lagging replica on another.',
+            hint='Set MEMCACHED_LOCATION, or unset DATABASE_REPLICA_HOST.',
+            id='contratista_be.E001',
+        )]
+    return []
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        identity = request_identity(request)
+        safe = request.method in SAFE_METHODS
+        _state.use_replica = safe and not (identity and cache.get(pin_key(identity)))
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.use_replica = False
+        if not safe:
+            if identity:
+                pin_to_primary(identity)
+            # A login's new session must not be looked up on a replica
+            session = response.cookies.get(settings.SESSION_COOKIE_NAME)
+            if session is not None and session.value:
+                pin_to_primary(session.value)
+        return response
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not getattr(_state, 'use_replica', False):
+            return DEFAULT_DB_ALIAS
+        replicas = [a for a in settings.DATABASE_REPLICAS if replica_is_healthy(a)]
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,31 @@
+"""
+Secret loading for settings.py.
+
+Values are read from the environment first and fall back to the
+optional, untracked contratista_be/secrets.py used in local development.
+"""
+import os
+from functools import lru_cache
+from importlib import import_module
+
+from django.core.exceptions import ImproperlyConfigured
+
+_MISSING = object()
+
+
+@lru_cache(maxsize=None)
+def _secrets_module():
+    try:
+        return import_module('contratista_be.secrets')
+    except ImportError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_secret(name, default=_MISSING):
+    value = os.environ.get(name)
+    if value is None:
+        value = getattr(_secrets_module(), name, default)
+    if value is _MISSING:
+        raise ImproperlyConfigured(f'Set the {name} environment variable')
+    return value
@@ -0,0 +1,90 @@
+"""
+Middleware for the token-only API.
+
+Requests under settings.TOKEN_API_PREFIX that carry an
+`Authorization: Token ...` header never use sessions, messages or CSRF
+(DRF authenticates them and its views are CSRF exempt), so
+BrowserMiddleware runs settings.BROWSER_MIDDLEWARE only for the other
+requests and hands token API requests straight to the rest of the stack.
+The wrapped middleware's view, template-response and exception hooks are
+forwarded the way Django's handler would call them, so CSRF checks still
+apply to browser requests.
+
+Sessions are kept in the cache; check_session_cache() warns on
+deployment checks when that cache is not shared between workers.
+"""
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.checks import Tags, Warning, register
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.module_loading import import_string
+
+from contratista_be.db_router import PROCESS_LOCAL_CACHES
+
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_session_cache(app_configs, **kwargs):
+    backend = settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND']
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES and backend in PROCESS_LOCAL_CACHES:
+        return [Warning(
+            'Sessions are cached in a process-local cache, so with several '
+            'workers most session reads still go to the database.',
+            hint='Set MEMCACHED_LOCATION.',
+            id='contratista_be.W001',
+        )]
+    return []
+
+
+def is_token_api_request(request):
+    if not request.path_info.startswith(settings.TOKEN_API_PREFIX):
+        return False
+    # TokenAuthentication matches the keyword case-insensitively
+    authorization = request.META.get('HTTP_AUTHORIZATION', '').split()
+    return bool(authorization) and authorization[0].lower() == 'token'
+
+
+class BrowserMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        handler = get_response
+        self.middleware = []
+        for path in reversed(settings.BROWSER_MIDDLEWARE):
+            try:
+                handler = import_string(path)(handler)
+            except MiddlewareNotUsed:
+                continue
+            self.middleware.insert(0, handler)
+        self.browser_chain = handler
+
+    def __call__(self, request):
+        if is_token_api_request(request):
+            return self.get_response(request)
+        return self.browser_chain(request)
+
+    def hooks(self, request, name, reverse=False):
+        if is_token_api_request(request):
+            return []
+        middleware = reversed(self.middleware) if reverse else self.middleware
+        return [getattr(m, name) for m in middleware if hasattr(m, name)]
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        for hook in self.hooks(request, 'process_view'):
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+
+    def process_template_response(self, request, response):
+        for hook in self.hooks(request, 'process_template_response', reverse=True):
+            response = hook(request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        for hook in self.hooks(request, 'process_exception', reverse=True):
+            response = hook(request, exception)
+            if response is not None:
+                return response
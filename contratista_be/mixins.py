@@ -0,0 +1,32 @@
+from rest_framework.response import Response
+
+
+class ValuesListModelMixin(object):
+    """
+    List a queryset straight from database rows, skipping model instances
+    and per-field to_representation(). Each readable serializer field is
+    fetched with values_list() using its source, with dotted sources
+    following relations.
+
+    Only use it where the serializer's readable fields are plain model
+    fields with no custom representation. Put it before
+    mixins.ListModelMixin in the bases.
+    """
+    def get_values_fields(self):
+        fields = self.get_serializer().fields
+        return {
+            name: field.source.replace('.', '__')
+            for name, field in fields.items()
+            if not field.write_only
+        }
+
+    def list(self, request, *args, **kwargs):
+        fields = self.get_values_fields()
+        names = tuple(fields)
+        queryset = self.filter_queryset(self.get_queryset()).values_list(*fields.values())
+
+        page = self.paginate_queryset(queryset)
+        rows = [dict(zip(names, row)) for row in (queryset if page is None else page)]
+        if page is not None:
+            return self.get_paginated_response(rows)
+        return Response(rows)
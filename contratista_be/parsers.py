@@ -0,0 +1,28 @@
+import orjson
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from contratista_be.renderers import FastJSONRenderer
+
+
+class FastJSONParser(parsers.JSONParser):
+    """
+    JSONParser that decodes with orjson. orjson always rejects NaN and
+    Infinity, so non-strict parsing uses the stdlib implementation.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not self.strict:
+            return super(FastJSONParser, self).parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            data = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
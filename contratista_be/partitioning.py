@@ -0,0 +1,262 @@
+"""
+Monthly PostgreSQL range partitioning for append-mostly tables.
+
+settings.PARTITIONED_TABLES maps a table to the timestamp column it is
+partitioned on and its retention. Each table has monthly partitions named
+<table>_pYYYYMM plus a <table>_default catch-all that should stay empty;
+the maintain_partitions task (scheduled by Celery beat) and command
+create partitions ahead of time and detach, archive (gzipped CSV) and
+drop those past retention, so
+queries filtered on the column only touch the months they ask for and
+vacuum/index work stays per month.
+
+PostgreSQL requires primary keys and unique indexes of a partitioned
+table to include the partition column, so a table can only be
+partitioned when no foreign key references it and it has no other unique
+constraints. to_partitioned() and to_plain() convert a table in place and
+are meant to be run from migrations.
+"""
+import gzip
+import os
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection as default_connection, transaction
+from django.utils import timezone
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+
+def partition_name(table, start):
+    return f'{table}_p{start:%Y%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def _config(table):
+    return settings.PARTITIONED_TABLES[table]
+
+
+def _columns(cursor, table):
+    cursor.execute(
+        'SELECT attname FROM pg_attribute '
+        'WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped ORDER BY attnum',
+        [table]
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def partitions(cursor, table):
+    """
+    Monthly partitions attached to `table` as sorted (start, name) pairs.
+    """
+    cursor.execute(
+        'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = %s::regclass',
+        [table]
+    )
+    pattern = re.compile(rf'^{re.escape(table)}_p(\d{{4}})(\d{{2}})$')
+    found = []
+    for name, in cursor.fetchall():
+        match = pattern.match(name)
+        if match:
+            found.append((datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc), name))
+    return sorted(found)
+
+
+def create_partition(cursor, table, column, start):
+    """
+    Create and attach the partition for the month starting at `start`.
+    Rows of that month that landed in the default partition are moved
+    into it first, as attaching would fail otherwise.
+    """
+    name = partition_name(table, start)
+    end = add_months(start, 1)
+    columns = ', '.join(f'"{c}"' for c in _columns(cursor, table))
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM "{default_partition_name(table)}" '
+        f'WHERE "{column}" >= %s AND "{column}" < %s RETURNING *) '
+        f'INSERT INTO "{name}" ({columns}) SELECT {columns} FROM moved',
+        [start, end]
+    )
+    cursor.execute(
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+        [start, end]
+    )
+    return name
+
+
+def archive_partition(cursor, name, path):
+    """
+    Write a detached partition's rows to `path` as gzipped CSV.
+    """
+    with gzip.open(path, 'wt', newline='') as f:
+        cursor.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER)', f)
+
+
+def maintain(table, now, ahead=3, archive_dir=None, detach_only=False, dry_run=False,
+             connection=None):
+    """
+    Bring `table`'s partitions in line with its configuration: create the
+    partitions from the current month up to `ahead` months ahead, and
+    detach the partitions that ended more than retention_days before
+    `now`. Detached partitions are archived to `archive_dir` if the table
+    is configured with archive=True and then dropped, unless
+    `detach_only` is set. Partitions are created in their own transaction
+    first, so a missing archive_dir, which raises ImproperlyConfigured,
+    never holds up new months. Returns a list of (action, partition)
+    pairs.
+    """
+    connection = connection or default_connection
+    config = _config(table)
+    actions = []
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        existing = {start for start, _ in partitions(cursor, table)}
+        current = month_start(now)
+        for offset in range(ahead + 1):
+            start = add_months(current, offset)
+            if start not in existing:
+                actions.append(('create', partition_name(table, start)))
+                if not dry_run:
+                    create_partition(cursor, table, config['column'], start)
+
+    archive = config.get('archive', True) and not detach_only
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cutoff = now - timedelta(days=config['retention_days'])
+        for start, name in partitions(cursor, table):
+            if add_months(start, 1) > cutoff:
+                continue
+            if archive and not archive_dir and not dry_run:
+                raise ImproperlyConfigured(
+                    f'{name} has expired; set PARTITION_ARCHIVE_DIR to archive and drop it')
+            actions.append(('detach', name))
+            if dry_run:
+                continue
+            cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+            if detach_only:
+                continue
+            if archive:
+                path = os.path.join(archive_dir, f'{name}.csv.gz')
+                archive_partition(cursor, name, path)
+                actions.append(('archive', path))
+            cursor.execute(f'DROP TABLE "{name}"')
+            actions.append(('drop', name))
+    return actions
+
+
+def _rebuild(schema_editor, table, partition_sql, primary_key):
+    """
+    Replace `table` with a copy created with `partition_sql` appended,
+    keeping its rows, defaults, sequences, indexes, foreign keys and their
+    names. Returns the new name of the original table, which the caller
+    copies the rows from and drops.
+    """
+    cursor = schema_editor.connection.cursor()
+    old = f'{table}_old'
+    cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{old}"')
+
+    cursor.execute(
+        "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f')",
+        [old]
+    )
+    constraints = cursor.fetchall()
+    if any(contype == 'u' for _, contype, _ in constraints):
+        raise ValueError(f'{table} has unique constraints and cannot be partitioned')
+    cursor.execute(
+        'SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x '
+        'JOIN pg_class i ON i.oid = x.indexrelid '
+        'WHERE x.indrelid = %s::regclass AND NOT x.indisprimary',
+        [old]
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        'SELECT pg_get_serial_sequence(%s, attname), attname FROM pg_attribute '
+        'WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped',
+        [old, old]
+    )
+    sequences = [(seq, column) for seq, column in cursor.fetchall() if seq]
+
+    for name, contype, _ in constraints:
+        if contype == 'p':
+            cursor.execute(f'ALTER TABLE "{old}" RENAME CONSTRAINT "{name}" TO "{old}_pkey"')
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX "{name}"')
+
+    cursor.execute(
+        f'CREATE TABLE "{table}" (LIKE "{old}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        f'{partition_sql}'
+    )
+    pkey = next(name for name, contype, _ in constraints if contype == 'p')
+    columns = ', '.join(f'"{c}"' for c in primary_key)
+    cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{pkey}" PRIMARY KEY ({columns})')
+    target = re.compile(rf' ON (ONLY )?(\w+\.)?"?{re.escape(old)}"? ')
+    for name, definition in indexes:
+        cursor.execute(target.sub(f' ON "{table}" ', definition, count=1))
+    for name, contype, definition in constraints:
+        if contype == 'f':
+            cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+    for sequence, column in sequences:
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY "{table}"."{column}"')
+    return old
+
+
+def to_partitioned(schema_editor, table, column, now=None):
+    """
+    Convert `table` into a table range partitioned on `column`, with
+    monthly partitions for its existing rows up to the current month and
+    a default partition.
+    """
+    cursor = schema_editor.connection.cursor()
+    cursor.execute(
+        "SELECT a.attname FROM pg_index x JOIN pg_attribute a "
+        "ON a.attrelid = x.indrelid AND a.attnum = ANY(x.indkey) "
+        "WHERE x.indrelid = %s::regclass AND x.indisprimary",
+        [table]
+    )
+    primary_key = [row[0] for row in cursor.fetchall()] + [column]
+    old = _rebuild(schema_editor, table, f' PARTITION BY RANGE ("{column}")', primary_key)
+
+    cursor.execute(
+        f'CREATE TABLE "{default_partition_name(table)}" PARTITION OF "{table}" DEFAULT')
+    cursor.execute(f'SELECT min("{column}") FROM "{old}"')
+    first, = cursor.fetchone()
+    current = month_start(now or timezone.now())
+    start = month_start(first) if first and first < current else current
+    while start <= current:
+        create_partition(cursor, table, column, start)
+        start = add_months(start, 1)
+
+    columns = ', '.join(f'"{c}"' for c in _columns(cursor, old))
+    cursor.execute(f'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "{old}"')
+    cursor.execute(f'DROP TABLE "{old}"')
+
+
+def to_plain(schema_editor, table, column):
+    """
+    Reverse of to_partitioned(): turn `table` back into a single table.
+    """
+    cursor = schema_editor.connection.cursor()
+    cursor.execute(
+        "SELECT a.attname FROM pg_index x JOIN pg_attribute a "
+        "ON a.attrelid = x.indrelid AND a.attnum = ANY(x.indkey) "
+        "WHERE x.indrelid = %s::regclass AND x.indisprimary",
+        [table]
+    )
+    primary_key = [row[0] for row in cursor.fetchall() if row[0] != column]
+    old = _rebuild(schema_editor, table, '', primary_key)
+    columns = ', '.join(f'"{c}"' for c in _columns(cursor, old))
+    cursor.execute(f'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "{old}"')
+    cursor.execute(f'DROP TABLE "{old}" CASCADE')
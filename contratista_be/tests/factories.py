@@ -0,0 +1,42 @@
+"""
+Model factories shared by the apps' tests.
+"""
+from accounts.models import User
+from services.models import Address, Company, Customer, Vendor
+
+
+def create_customer(email):
+    user = User.objects.create_user(email=email, password='testpassword')
+    return Customer.objects.create(
+        first_name=email.split('@')[0],
+        last_name='Vendor',
+        primary_phone='5555555555',
+        user=user
+    )
+
+
+def create_company(rnc, name):
+    return Company.objects.create(
+        rnc=rnc, name=name, created_by=create_customer(f'owner{rnc}@builders.com'))
+
+
+def create_vendor(email, company=None, career=None, latlng=None, city='', sector=''):
+    """
+    A vendor with its own customer. Passing latlng, city or sector also
+    gives it a primary address.
+    """
+    customer = create_customer(email)
+    if latlng is not None or city or sector:
+        address = Address.objects.create(
+            full_name='Shop',
+            address_line_one=f'c/ {email}',
+            city=city,
+            sector=sector,
+            phone_number='5555555555',
+            is_primary=True,
+            owner=customer
+        )
+        if latlng is not None:
+            Address.objects.filter(pk=address.pk).update(
+                latitude=latlng[0], longitude=latlng[1])
+    return Vendor.objects.create(company=company, career=career, customer=customer)
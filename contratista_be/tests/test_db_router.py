@@ -0,0 +1,132 @@
+import time
+from unittest.mock import patch
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from accounts.models import User
+from contratista_be import db_router
+from contratista_be.db_router import PrimaryReplicaRouter, ReplicaRoutingMiddleware
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+@patch('contratista_be.db_router.replica_is_healthy', return_value=True)
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+
+    def route(self, method, **extra):
+        """
+        Return the alias a read of User is routed to while the middleware
+        handles the request.
+        """
+        aliases = []
+
+        def view(request):
+            aliases.append(self.router.db_for_read(User))
+            return HttpResponse()
+
+        request = getattr(self.factory, method)('/api/v1/users/', **extra)
+        ReplicaRoutingMiddleware(view)(request)
+        return aliases[0]
+
+    def test_safe_reads_go_to_replica(self, mock_healthy):
+        self.assertEqual(self.route('get'), 'replica')
+        self.assertEqual(self.route('head'), 'replica')
+
+    def test_unsafe_requests_stay_on_primary(self, mock_healthy):
+        self.assertEqual(self.route('post'), 'default')
+        self.assertEqual(self.router.db_for_write(User), 'default')
+
+    def test_reads_outside_requests_stay_on_primary(self, mock_healthy):
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_writer_is_pinned_to_primary(self, mock_healthy):
+        self.route('patch', HTTP_AUTHORIZATION='Token abc')
+        self.assertEqual(self.route('get', HTTP_AUTHORIZATION='Token abc'), 'default')
+        self.assertEqual(self.route('get', HTTP_AUTHORIZATION='Token xyz'), 'replica')
+
+    def test_issued_credentials_can_be_pinned(self, mock_healthy):
+        db_router.pin_to_primary('abc')
+        self.assertEqual(self.route('get', HTTP_AUTHORIZATION='Token abc'), 'default')
+        self.assertEqual(self.route('get', HTTP_AUTHORIZATION='token abc'), 'default')
+
+    def test_new_session_is_pinned(self, mock_healthy):
+        def login(request):
+            response = HttpResponse()
+            response.set_cookie(settings.SESSION_COOKIE_NAME, 'new-session')
+            return response
+
+        ReplicaRoutingMiddleware(login)(self.factory.post('/admin/login/'))
+        self.factory.cookies[settings.SESSION_COOKIE_NAME] = 'new-session'
+        self.assertEqual(self.route('get'), 'default')
+
+    @override_settings(DATABASE_REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self, mock_healthy):
+        self.route('patch', HTTP_AUTHORIZATION='Token abc')
+        self.assertEqual(self.route('get', HTTP_AUTHORIZATION='Token abc'), 'replica')
+
+    def test_unhealthy_replica_falls_back_to_primary(self, mock_healthy):
+        mock_healthy.return_value = False
+        self.assertEqual(self.route('get'), 'default')
+
+
+@override_settings(DATABASE_REPLICA_MAX_LAG=2, DATABASE_REPLICA_CHECK_INTERVAL=60)
+class ReplicaHealthTests(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        db_router._health.clear()
+        self.addCleanup(db_router._health.clear)
+
+    def test_same_server_alias_is_healthy(self):
+        self.assertIsNone(db_router.replica_lag('replica'))
+        self.assertTrue(db_router.check_replica('replica'))
+        self.assertTrue(db_router.replica_is_healthy('replica'))
+
+    @patch('contratista_be.db_router.replica_lag', return_value=10)
+    def test_lagging_replica_is_unhealthy(self, mock_lag):
+        self.assertFalse(db_router.check_replica('replica'))
+
+    @patch('contratista_be.db_router.replica_lag', side_effect=DatabaseError)
+    def test_unreachable_replica_is_unhealthy(self, mock_lag):
+        self.assertFalse(db_router.check_replica('replica'))
+
+    @patch('contratista_be.db_router.replica_lag', return_value=0)
+    def test_health_is_cached(self, mock_lag):
+        db_router.check_replica('replica')
+        db_router.replica_is_healthy('replica')
+        db_router.replica_is_healthy('replica')
+        self.assertEqual(mock_lag.call_count, 1)
+
+    @patch('contratista_be.db_router.replica_lag', return_value=10)
+    def test_stale_health_is_refreshed_in_background(self, mock_lag):
+        db_router._health['replica'] = (time.monotonic() - 120, True)
+        # The last result is served while the check runs
+        self.assertTrue(db_router.replica_is_healthy('replica'))
+        thread = db_router._checks.get('replica')
+        if thread is not None:
+            thread.join()
+        self.assertFalse(db_router.replica_is_healthy('replica'))
+        self.assertEqual(mock_lag.call_count, 1)
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    MEMCACHED = {'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': '127.0.0.1:11211',
+    }}
+
+    def test_replicas_need_a_shared_cache(self):
+        with override_settings(DATABASE_REPLICAS=['replica']):
+            errors = db_router.check_shared_cache(None)
+            self.assertEqual([e.id for e in errors], ['contratista_be.E001'])
+        with override_settings(DATABASE_REPLICAS=['replica'], CACHES=self.MEMCACHED):
+            self.assertEqual(db_router.check_shared_cache(None), [])
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(db_router.check_shared_cache(None), [])
@@ -0,0 +1,50 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from contratista_be.middleware import BrowserMiddleware, check_session_cache
+
+
+def view(request):
+    return HttpResponse(','.join(
+        name for name in ('session', 'user', '_messages') if hasattr(request, name)))
+
+
+class BrowserMiddlewareTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = BrowserMiddleware(view)
+
+    def test_token_api_requests_skip_browser_middleware(self):
+        for keyword in ('Token', 'token', 'TOKEN'):
+            request = self.factory.get('/api/v1/users/', HTTP_AUTHORIZATION=f'{keyword} abc')
+            self.assertEqual(self.middleware(request).content, b'')
+
+    def test_other_requests_get_browser_middleware(self):
+        for request in (
+            self.factory.get('/api/v1/users/'),
+            self.factory.get('/api/v1/users/', HTTP_AUTHORIZATION='Tokens abc'),
+            self.factory.get('/static/app.js', HTTP_AUTHORIZATION='Token abc'),
+        ):
+            self.assertEqual(self.middleware(request).content, b'session,user,_messages')
+
+    def test_csrf_applies_to_browser_requests_only(self):
+        browser = self.factory.post('/api/v1/users/')
+        response = self.middleware.process_view(browser, view, (), {})
+        self.assertEqual(response.status_code, 403)
+
+        token = self.factory.post('/api/v1/users/', HTTP_AUTHORIZATION='Token abc')
+        self.assertIsNone(self.middleware.process_view(token, view, (), {}))
+
+
+class SessionCacheCheckTests(SimpleTestCase):
+
+    def test_cached_sessions_need_a_shared_cache(self):
+        self.assertEqual([w.id for w in check_session_cache(None)], ['contratista_be.W001'])
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': '127.0.0.1:11211',
+        }}):
+            self.assertEqual(check_session_cache(None), [])
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db'):
+            self.assertEqual(check_session_cache(None), [])
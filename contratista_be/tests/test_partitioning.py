@@ -0,0 +1,105 @@
+import csv
+import gzip
+import os
+import tempfile
+from shutil import rmtree
+from django.db import connection
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from contratista_be import partitioning
+from contratista_be.tests.factories import create_customer
+from services.models import Address, GeocodeOutbox
+from services.tasks import maintain_partitions
+
+TABLE = 'services_geocodeoutbox'
+
+
+class PartitionMaintenanceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.address = Address.objects.create(
+            full_name='Home',
+            address_line_one='c/ Duarte',
+            phone_number='5555555555',
+            owner=create_customer('waldo@findme.com')
+        )
+
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(rmtree, self.archive_dir)
+        self.now = timezone.now()
+        self.old_month = partitioning.add_months(partitioning.month_start(self.now), -5)
+        self.old = GeocodeOutbox.objects.create(address=self.address)
+        # Months without a partition land in the default one
+        GeocodeOutbox.objects.filter(pk=self.old.pk).update(created_at=self.old_month)
+
+    def count(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM "{table}"')
+            return cursor.fetchone()[0]
+
+    def test_creating_a_partition_moves_its_rows_out_of_default(self):
+        self.assertEqual(self.count(partitioning.default_partition_name(TABLE)), 1)
+        with connection.cursor() as cursor:
+            name = partitioning.create_partition(cursor, TABLE, 'created_at', self.old_month)
+        self.assertEqual(self.count(partitioning.default_partition_name(TABLE)), 0)
+        self.assertEqual(self.count(name), 1)
+
+    def test_maintain_creates_ahead_and_archives_expired(self):
+        with connection.cursor() as cursor:
+            old = partitioning.create_partition(cursor, TABLE, 'created_at', self.old_month)
+        actions = partitioning.maintain(TABLE, self.now, ahead=2, archive_dir=self.archive_dir)
+
+        current = partitioning.month_start(self.now)
+        path = os.path.join(self.archive_dir, f'{old}.csv.gz')
+        self.assertEqual(actions, [
+            ('create', partitioning.partition_name(TABLE, partitioning.add_months(current, 1))),
+            ('create', partitioning.partition_name(TABLE, partitioning.add_months(current, 2))),
+            ('detach', old),
+            ('archive', path),
+            ('drop', old),
+        ])
+        with connection.cursor() as cursor:
+            self.assertEqual(
+                [start for start, _ in partitioning.partitions(cursor, TABLE)],
+                [partitioning.add_months(current, i) for i in range(3)]
+            )
+        with gzip.open(path, 'rt') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([int(row['id']) for row in rows], [self.old.pk])
+        self.assertEqual(
+            list(GeocodeOutbox.objects.values_list('address_id', flat=True)),
+            [self.address.pk]
+        )
+
+    def test_dry_run_changes_nothing(self):
+        with connection.cursor() as cursor:
+            before = partitioning.partitions(cursor, TABLE)
+            partitioning.maintain(TABLE, self.now, ahead=2, dry_run=True)
+            self.assertEqual(partitioning.partitions(cursor, TABLE), before)
+
+    def test_missing_archive_dir_keeps_expired_partitions(self):
+        with connection.cursor() as cursor:
+            old = partitioning.create_partition(cursor, TABLE, 'created_at', self.old_month)
+        with self.assertRaises(ImproperlyConfigured):
+            partitioning.maintain(TABLE, self.now, ahead=1)
+        with connection.cursor() as cursor:
+            names = [name for _, name in partitioning.partitions(cursor, TABLE)]
+        current = partitioning.month_start(self.now)
+        # New months are still created
+        self.assertEqual(names, [old] + [
+            partitioning.partition_name(TABLE, partitioning.add_months(current, i))
+            for i in range(2)
+        ])
+
+    def test_scheduled_task_maintains_every_table(self):
+        with override_settings(PARTITION_ARCHIVE_DIR=self.archive_dir):
+            actions = maintain_partitions(ahead=2)
+        current = partitioning.month_start(self.now)
+        self.assertEqual(actions, {TABLE: [
+            ('create', partitioning.partition_name(TABLE, partitioning.add_months(current, i)))
+            for i in (1, 2)
+        ]})
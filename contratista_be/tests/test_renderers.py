@@ -0,0 +1,67 @@
+import datetime
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from io import BytesIO
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from contratista_be.parsers import FastJSONParser
+from contratista_be.renderers import FastJSONRenderer
+
+DATA = OrderedDict((
+    ('id', 1),
+    ('name', 'Mérida\u2028DunBroch'),
+    ('registered_at', datetime.datetime(2017, 9, 5, 14, 30, 1, 123456, tzinfo=timezone.utc)),
+    ('birthday', datetime.date(2000, 1, 31)),
+    ('rate', Decimal('12.50')),
+    ('key', uuid.UUID('12345678123456781234567812345678')),
+    ('tags', ['a', None, True, 1.5]),
+    ('nested', [{'b': 1}, {2: 'int key'}]),
+))
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def test_output_matches_json_renderer(self):
+        self.assertEqual(
+            FastJSONRenderer().render(DATA),
+            JSONRenderer().render(DATA)
+        )
+
+    def test_none_renders_empty(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_indent_is_honoured(self):
+        rendered = FastJSONRenderer().render(
+            {'a': 1}, 'application/json; indent=4')
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+    def test_nan_renders_as_null(self):
+        self.assertEqual(FastJSONRenderer().render([float('nan')]), b'[null]')
+
+
+class FastJSONParserTests(SimpleTestCase):
+
+    def parse(self, parser, body, encoding='utf-8'):
+        return parser.parse(BytesIO(body), parser_context={'encoding': encoding})
+
+    def test_output_matches_json_parser(self):
+        body = '{"a": [1, 2.5, null, true], "b": "Mérida"}'.encode()
+        self.assertEqual(
+            self.parse(FastJSONParser(), body),
+            self.parse(JSONParser(), body)
+        )
+
+    def test_other_encodings(self):
+        body = '{"b": "Mérida"}'.encode('latin-1')
+        self.assertEqual(
+            self.parse(FastJSONParser(), body, 'latin-1'), {'b': 'Mérida'})
+
+    def test_invalid_json_raises_parse_error(self):
+        for body in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                self.parse(FastJSONParser(), body)
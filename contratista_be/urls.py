@@ -7,12 +7,15 @@ from accounts.api import (
     UserViewSet,
     RegisterUserViewSet
 )
+from services.api import CompanyViewSet, StatsViewSet
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
+router.register(r'companies', CompanyViewSet)
+router.register(r'stats', StatsViewSet, base_name='stats')
 router.register(r'register', RegisterUserViewSet, base_name='register')
 # router.register(r'my_viewset', MyViewSet)
 
 urlpatterns = [
-    url(r'^api/v1/', throttled_obtain_token, name='get-token'),
+    url(r'^api/v1/$', throttled_obtain_token, name='get-token'),
     url(r'^api/v1/', include(router.urls)),  
 ]
@@ -0,0 +1,156 @@
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import Count, Max, Min, OuterRef, Q, Subquery
+from django.utils.dateparse import parse_date
+from rest_framework import viewsets, mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+
+from contratista_be.mixins import ValuesListModelMixin
+from services import stats
+from services.models import (
+    Address,
+    Career,
+    Category,
+    Company,
+    Institution,
+    StatCount,
+    Vendor,
+)
+from services.serializers import CompanyDetailSerializer, CompanySerializer
+
+ROSTER_FIELDS = (
+    ('id', 'id'),
+    ('display_name', 'customer__display_name'),
+    ('career', 'career__trade_name'),
+    ('address', 'address'),
+    ('latitude', 'latitude'),
+    ('longitude', 'longitude'),
+)
+
+
+class CompanyViewSet(ValuesListModelMixin,
+                        mixins.RetrieveModelMixin,
+                        mixins.ListModelMixin,
+                        viewsets.GenericViewSet):
+    """
+    Read-only company directory. Lists sort on the cached member_count;
+    the detail view and the members roster are each a single query.
+    """
+    queryset = Company.objects.all()
+    serializer_class = CompanySerializer
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+    filter_backends = (OrderingFilter,)
+    ordering_fields = ('member_count', 'name', 'created_at')
+    ordering = ('-member_count', 'id')
+
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return CompanyDetailSerializer
+        return self.serializer_class
+
+    def get_queryset(self):
+        queryset = super(CompanyViewSet, self).get_queryset()
+        if self.action != 'retrieve':
+            return queryset
+        primary = Q(members__customer__addresses__is_primary=True)
+        return queryset.annotate(
+            members_counted=Count('members', distinct=True),
+            careers=ArrayAgg(
+                'members__career__trade_name',
+                distinct=True,
+                filter=Q(members__career__isnull=False)
+            ),
+            south=Min('members__customer__addresses__latitude', filter=primary),
+            north=Max('members__customer__addresses__latitude', filter=primary),
+            west=Min('members__customer__addresses__longitude', filter=primary),
+            east=Max('members__customer__addresses__longitude', filter=primary),
+        )
+
+    @action(detail=True)
+    def members(self, request, pk=None):
+        company = self.get_object()
+        # Each subquery is a lookup on the one-primary-address unique index
+        primary = Address.objects.filter(owner=OuterRef('customer'), is_primary=True)
+        vendors = (
+            Vendor.objects
+            .filter(company=company)
+            .annotate(
+                address=Subquery(primary.values('formatted_name')),
+                latitude=Subquery(primary.values('latitude')),
+                longitude=Subquery(primary.values('longitude')),
+            )
+            .order_by('id')
+            .values_list(*(lookup for _, lookup in ROSTER_FIELDS))
+        )
+        names = tuple(name for name, _ in ROSTER_FIELDS)
+        page = self.paginate_queryset(vendors)
+        return self.get_paginated_response([dict(zip(names, row)) for row in page])
+
+
+# Label lookups for the dimensions keyed by id
+STAT_LABELS = {
+    stats.CAREER: (Career, 'trade_name'),
+    stats.CATEGORY: (Category, 'name'),
+    stats.INSTITUTION: (Institution, 'short_name'),
+}
+
+
+class StatsViewSet(viewsets.ViewSet):
+    """
+    Marketplace statistics read from the materialized StatCount rows, so
+    a dashboard load costs an index lookup per dimension however large
+    the marketplace grows. Signups are ordered by day and can be limited
+    with ?since= and ?until= (YYYY-MM-DD, inclusive); the other dimensions
+    are ordered by count.
+    """
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+    lookup_field = 'dimension'
+    lookup_value_regex = '[a-z]+'
+
+    def date_param(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: 'Enter a date in YYYY-MM-DD format.'})
+        return parsed
+
+    def list(self, request):
+        return Response({'dimensions': stats.DIMENSIONS})
+
+    def retrieve(self, request, dimension=None):
+        if dimension not in stats.DIMENSIONS:
+            raise NotFound()
+        rows = StatCount.objects.filter(dimension=dimension, count__gt=0)
+        if dimension == stats.SIGNUPS:
+            since, until = self.date_param('since'), self.date_param('until')
+            if since is not None:
+                rows = rows.filter(key__gte=since.isoformat())
+            if until is not None:
+                rows = rows.filter(key__lte=until.isoformat())
+            rows = rows.order_by('key')
+        else:
+            rows = rows.order_by('-count', 'key')
+        rows = list(rows.values_list('key', 'count'))
+
+        labels = {}
+        if dimension in STAT_LABELS:
+            model, field = STAT_LABELS[dimension]
+            labels = {
+                str(pk): label for pk, label in
+                model.objects.filter(pk__in=[key for key, _ in rows]).values_list('pk', field)
+            }
+        return Response({
+            'dimension': dimension,
+            'results': [
+                {'key': key, 'label': labels.get(key, key), 'count': count}
+                for key, count in rows
+            ],
+        })
@@ -7,4 +7,7 @@ class ServicesConfig(AppConfig):
 
     def ready(self):
         import services.signals
+        # Register the cache system checks
+        import contratista_be.db_router
+        import contratista_be.middleware
         super(ServicesConfig, self).ready()
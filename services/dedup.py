@@ -0,0 +1,340 @@
+"""
+Duplicate detection for Customer and Address imports.
+
+Records are normalized once (phones to bare national digits, addresses to
+accent-free lower-case tokens with common abbreviations expanded) and
+placed into blocks by cheap keys: the normalized phone for customers; the
+sorted-token key plus house numbers and MinHash bands over the street's
+character trigrams for addresses. Only records sharing a block are scored
+against each other, so a batch is deduplicated in roughly linear time
+instead of comparing every pair. Blocks that grow past
+MAX_BLOCK_COMPARISONS members (a switchboard phone shared by a whole
+partner company, a templated street) are split into sub-blocks by MinHash
+bands of a second field, the name for customers and the locality for
+addresses, and a record is only scored against the members of the
+sub-blocks it falls into.
+
+The same keys are stored on Customer.phone_key and Address.name_key;
+find_existing_customers() and find_existing_addresses() look a single
+record up against the database through them.
+"""
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from functools import lru_cache
+
+ABBREVIATIONS = {
+    'c': 'calle',
+    'cl': 'calle',
+    'av': 'avenida',
+    'ave': 'avenida',
+    'aut': 'autopista',
+    'no': 'numero',
+    'num': 'numero',
+    'esq': 'esquina',
+    'apto': 'apartamento',
+    'apt': 'apartamento',
+    'edif': 'edificio',
+    'res': 'residencial',
+    'urb': 'urbanizacion',
+    'sto': 'santo',
+    'dgo': 'domingo',
+}
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+_NON_DIGITS = re.compile(r'[^0-9]')
+
+# MinHash LSH parameters: 8 bands of 4 rows puts the 50% candidate
+# threshold at a trigram Jaccard similarity of about 0.6.
+MINHASH_BANDS = 8
+MINHASH_ROWS = 4
+MINHASH_PRIME = 4294967311
+
+CUSTOMER_THRESHOLD = 0.6
+ADDRESS_THRESHOLD = 0.6
+
+# Blocks with more members than this are searched through sub-blocks
+MAX_BLOCK_COMPARISONS = 50
+
+# Words that say little about which address is meant
+STOPWORDS = {
+    'calle', 'avenida', 'autopista', 'carretera', 'numero', 'esquina', 'casa',
+    'apartamento', 'edificio', 'residencial', 'urbanizacion', 'sector',
+    'de', 'del', 'la', 'las', 'el', 'los', 'y',
+    'dominican', 'republic', 'republica', 'dominicana',
+}
+
+
+def normalize_phone(phone):
+    """
+    Digits only, without the +1 NANP country code, so '(809) 555-1234',
+    '809.555.1234' and '+1 809 555 1234' all become '8095551234'.
+    """
+    digits = _NON_DIGITS.sub('', phone or '')
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    return digits
+
+
+def tokens(text):
+    """
+    Accent-free, lower-case words of `text` with abbreviations expanded.
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    text = text.encode('ascii', 'ignore').decode('ascii').lower()
+    return [ABBREVIATIONS.get(token, token) for token in _NON_ALNUM.split(text) if token]
+
+
+def address_key(formatted_name):
+    """
+    Order-insensitive key of an address: its distinct tokens, sorted.
+    """
+    return ' '.join(sorted(set(tokens(formatted_name))))
+
+
+def trigrams(words):
+    text = f' {" ".join(words)} '
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _minhash_params():
+    import numpy as np
+    rng = np.random.RandomState(1729)
+    size = MINHASH_BANDS * MINHASH_ROWS
+    return (rng.randint(1, 2 ** 31 - 1, size=size).astype(np.int64),
+            rng.randint(0, 2 ** 31 - 1, size=size).astype(np.int64))
+
+
+_minhash = None
+
+
+@lru_cache(maxsize=65536)
+def band_keys(text):
+    """
+    MinHash LSH band keys of the trigrams of `text`. Texts with a high
+    trigram Jaccard similarity are likely to share at least one key.
+    Cached, as many addresses share a street.
+    """
+    global _minhash
+    import numpy as np
+    grams = trigrams(text.split())
+    if not grams:
+        return []
+    if _minhash is None:
+        _minhash = _minhash_params()
+    a, b = _minhash
+    hashes = np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.int64, count=len(grams))
+    signature = ((a[:, None] * hashes[None, :] + b[:, None]) % MINHASH_PRIME).min(axis=1)
+    raw = signature.tobytes()
+    width = len(raw) // MINHASH_BANDS
+    return [(i, raw[i * width:(i + 1) * width]) for i in range(MINHASH_BANDS)]
+
+
+class Deduplicator(object):
+    """
+    Incremental blocking deduplicator. Subclasses define how a raw record
+    is prepared, which block keys and sub-block keys it falls into and how
+    two prepared records are scored.
+
+    check() returns the ids of already added records a new one duplicates;
+    add() registers a record; clusters() groups a whole batch.
+    """
+    threshold = 1.0
+
+    def __init__(self, threshold=None):
+        if threshold is not None:
+            self.threshold = threshold
+        self.prepared = {}
+        self.blocks = defaultdict(list)
+        # Block key -> sub-block key -> ids, for blocks past the limit
+        self.sub_blocks = {}
+
+    def prepare(self, record):
+        raise NotImplementedError
+
+    def block_keys(self, prepared):
+        raise NotImplementedError
+
+    def sub_block_keys(self, prepared):
+        """
+        Keys splitting a large block; must not be empty, so every record
+        stays reachable.
+        """
+        raise NotImplementedError
+
+    def similarity(self, a, b):
+        raise NotImplementedError
+
+    def check(self, record):
+        return self._matches(*self._prepare(record))
+
+    def add(self, record_id, record):
+        self._add(record_id, *self._prepare(record))
+
+    def _prepare(self, record):
+        prepared = self.prepare(record)
+        return prepared, self.block_keys(prepared)
+
+    def _matches(self, prepared, keys):
+        candidates = set()
+        sub_keys = None
+        for key in keys:
+            sub_blocks = self.sub_blocks.get(key)
+            if sub_blocks is None:
+                candidates.update(self.blocks.get(key, ()))
+                continue
+            if sub_keys is None:
+                sub_keys = self.sub_block_keys(prepared)
+            for sub_key in sub_keys:
+                candidates.update(sub_blocks.get(sub_key, ()))
+        return sorted(
+            other for other in candidates
+            if self.similarity(prepared, self.prepared[other]) >= self.threshold
+        )
+
+    def _add(self, record_id, prepared, keys):
+        self.prepared[record_id] = prepared
+        sub_keys = None
+        for key in keys:
+            block = self.blocks[key]
+            block.append(record_id)
+            sub_blocks = self.sub_blocks.get(key)
+            if sub_blocks is None:
+                if len(block) <= MAX_BLOCK_COMPARISONS:
+                    continue
+                # Split the block now that it is too large to scan
+                sub_blocks = self.sub_blocks[key] = defaultdict(list)
+                for other in block[:-1]:
+                    for sub_key in self.sub_block_keys(self.prepared[other]):
+                        sub_blocks[sub_key].append(other)
+            if sub_keys is None:
+                sub_keys = self.sub_block_keys(prepared)
+            for sub_key in sub_keys:
+                sub_blocks[sub_key].append(record_id)
+
+    def clusters(self, records):
+        """
+        Group (record_id, record) pairs into clusters of duplicates; only
+        clusters with more than one record are returned.
+        """
+        parent = {}
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for record_id, record in records:
+            parent[record_id] = record_id
+            prepared, keys = self._prepare(record)
+            for other in self._matches(prepared, keys):
+                parent[find(other)] = find(record_id)
+            self._add(record_id, prepared, keys)
+
+        groups = defaultdict(list)
+        for record_id in parent:
+            groups[find(record_id)].append(record_id)
+        return [sorted(group) for group in groups.values() if len(group) > 1]
+
+
+class CustomerDeduplicator(Deduplicator):
+    """
+    Customers are duplicates when they share a normalized phone number
+    and their names are similar. Records are dicts with first_name,
+    last_name, primary_phone and optionally secondary_phone.
+    """
+    threshold = CUSTOMER_THRESHOLD
+
+    def prepare(self, record):
+        phones = {normalize_phone(record.get('primary_phone')),
+                  normalize_phone(record.get('secondary_phone'))}
+        phones.discard('')
+        name = tokens(f'{record.get("first_name", "")} {record.get("last_name", "")}')
+        return phones, trigrams(name), ' '.join(name)
+
+    def block_keys(self, prepared):
+        return list(prepared[0])
+
+    def sub_block_keys(self, prepared):
+        return band_keys(prepared[2]) or [None]
+
+    def similarity(self, a, b):
+        return jaccard(a[1], b[1])
+
+
+class AddressDeduplicator(Deduplicator):
+    """
+    Addresses are duplicates when they carry the same house numbers and
+    both their street parts (before the first comma) and their localities
+    (the rest) are similar after normalization. Records are dicts with
+    formatted_name, which Address builds as 'line one, sector, city, ...'.
+    """
+    threshold = ADDRESS_THRESHOLD
+
+    def prepare(self, record):
+        street, _, locality = (record.get('formatted_name') or '').partition(',')
+        words, locality = tokens(street), tokens(locality)
+        street = ' '.join(w for w in words if w not in STOPWORDS and not w.isdigit())
+        return (
+            ' '.join(sorted(set(words + locality))),
+            ' '.join(sorted({w for w in words if w.isdigit()})),
+            street,
+            trigrams(street.split()),
+            ' '.join(locality),
+            trigrams([w for w in locality if w not in STOPWORDS]),
+            ' '.join(w for w in locality if w not in STOPWORDS),
+        )
+
+    def block_keys(self, prepared):
+        key, numbers, street = prepared[:3]
+        return [('t', key)] + [(band, numbers) for band in band_keys(street)]
+
+    def sub_block_keys(self, prepared):
+        return band_keys(prepared[6]) or [None]
+
+    def similarity(self, a, b):
+        if a[0] == b[0]:
+            return 1.0
+        if a[1] != b[1]:
+            return 0.0
+        street = 1.0 if a[2] == b[2] else jaccard(a[3], b[3])
+        return min(street, 1.0 if a[4] == b[4] else jaccard(a[5], b[5]))
+
+
+def find_existing_customers(record, threshold=CUSTOMER_THRESHOLD):
+    """
+    Ids of stored customers the record duplicates, found through the
+    Customer.phone_key index.
+    """
+    from .models import Customer
+    finder = CustomerDeduplicator(threshold)
+    phones = finder.prepare(record)[0]
+    if not phones:
+        return []
+    existing = Customer.objects.filter(phone_key__in=phones).values(
+        'id', 'first_name', 'last_name', 'primary_phone', 'secondary_phone')
+    for row in existing:
+        finder.add(row['id'], row)
+    return finder.check(record)
+
+
+def find_existing_addresses(record, owner=None):
+    """
+    Ids of stored addresses whose normalized formatted name matches the
+    record's, found through the Address.name_key index. Unlike batch
+    deduplication this only catches differences in case, accents,
+    punctuation, abbreviations and word order, not typos.
+    """
+    from .models import Address
+    addresses = Address.objects.filter(name_key=address_key(record.get('formatted_name')))
+    if owner is not None:
+        addresses = addresses.filter(owner=owner)
+    return list(addresses.order_by('id').values_list('id', flat=True))
@@ -0,0 +1,111 @@
+import time
+from importlib import import_module
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.views import APIView
+
+from accounts.models import AuthToken, User
+
+BROWSER_MIDDLEWARE = 'contratista_be.middleware.BrowserMiddleware'
+LEGACY_SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+
+def legacy_middleware():
+    """
+    settings.MIDDLEWARE with the browser middleware inlined, i.e. the
+    stack every request went through before BrowserMiddleware.
+    """
+    stack = []
+    for path in settings.MIDDLEWARE:
+        stack.extend(settings.BROWSER_MIDDLEWARE if path == BROWSER_MIDDLEWARE else [path])
+    return stack
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure per-request time and queries of API requests through the '
+        'legacy stack (every middleware, database sessions) and the '
+        'configured one, for a token-authenticated client and for a client '
+        'sending only a session cookie, then the time and queries of a '
+        'session load with database and configured sessions. Runs in a '
+        'rolled back transaction, with API throttling off.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Requests per measurement (default: 200)',
+        )
+        parser.add_argument(
+            '--path', default='/api/v1/users/',
+            help='Path to GET (default: /api/v1/users/)',
+        )
+
+    def measure(self, label, middleware, session_engine, use_token, options):
+        user = User.objects.create_user(
+            email=f'benchmark-{label.replace(" ", "-")}@contratista.invalid',
+            password=User.objects.make_random_password(),
+        )
+        session = import_module(session_engine).SessionStore()
+        session['_auth_user_id'] = str(user.pk)
+        session.create()
+
+        with override_settings(MIDDLEWARE=middleware, SESSION_ENGINE=session_engine):
+            extra = {'SERVER_NAME': 'localhost'}
+            if use_token:
+                extra['HTTP_AUTHORIZATION'] = f'Token {AuthToken.objects.create(user=user).key}'
+            client = Client(**extra)
+            client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+            response = client.get(options['path'])
+            if response.status_code != 200:
+                raise CommandError(f'GET {options["path"]} returned {response.status_code}')
+
+            n = options['requests']
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                for _ in range(n):
+                    client.get(options['path'])
+                elapsed = time.perf_counter() - started
+        # Rolling back does not remove the session from a cached engine's cache
+        session.delete()
+        return elapsed / n * 1e6, len(queries) / n
+
+    def measure_session_loads(self, session_engine, options):
+        SessionStore = import_module(session_engine).SessionStore
+        session = SessionStore()
+        session['_auth_user_id'] = '0'
+        session.create()
+
+        n = options['requests']
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(n):
+                SessionStore(session.session_key).load()
+            elapsed = time.perf_counter() - started
+        session.delete()
+        return elapsed / n * 1e6, len(queries) / n
+
+    def handle(self, *args, **options):
+        profiles = (
+            ('legacy', legacy_middleware(), LEGACY_SESSION_ENGINE),
+            ('current', settings.MIDDLEWARE, settings.SESSION_ENGINE),
+        )
+        self.stdout.write(f'{"client":<10} {"stack":<10} {"us/request":>12} {"queries":>8}')
+        with transaction.atomic(), patch.object(APIView, 'get_throttles', return_value=[]):
+            for client, use_token in (('token', True), ('session', False)):
+                for stack, middleware, engine in profiles:
+                    us, queries = self.measure(
+                        f'{client} {stack}', middleware, engine, use_token, options)
+                    self.stdout.write(f'{client:<10} {stack:<10} {us:>12.0f} {queries:>8.1f}')
+
+            self.stdout.write(f'\ncache: {settings.CACHES["default"]["BACKEND"]}')
+            self.stdout.write(f'{"sessions":<21} {"us/load":>12} {"queries":>8}')
+            for engine in (LEGACY_SESSION_ENGINE, settings.SESSION_ENGINE):
+                us, queries = self.measure_session_loads(engine, options)
+                self.stdout.write(f'{engine.rsplit(".", 1)[-1]:<21} {us:>12.0f} {queries:>8.1f}')
+            transaction.set_rollback(True)
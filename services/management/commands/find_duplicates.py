@@ -0,0 +1,76 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from services import dedup
+from services.models import Address, Customer
+
+MODELS = {
+    'customers': (
+        Customer, dedup.CustomerDeduplicator,
+        ('first_name', 'last_name', 'primary_phone', 'secondary_phone'),
+    ),
+    'addresses': (Address, dedup.AddressDeduplicator, ('formatted_name',)),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Find clusters of duplicate customers or addresses, either among the '
+        'stored rows or in a CSV import file (optionally also against the '
+        'stored rows). Prints one cluster per line.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(MODELS))
+        parser.add_argument(
+            '--file',
+            help='CSV file with a header row naming the record fields; rows '
+                 'are identified by their line number',
+        )
+        parser.add_argument(
+            '--against-db', action='store_true',
+            help='With --file, also report rows that duplicate stored records',
+        )
+        parser.add_argument(
+            '--threshold', type=float,
+            help='Minimum similarity between 0 and 1 (default: per model)',
+        )
+
+    def read_file(self, path, fields):
+        try:
+            with open(path, newline='') as f:
+                reader = csv.DictReader(f)
+                missing = set(fields) - {'secondary_phone'} - set(reader.fieldnames or ())
+                if missing:
+                    raise CommandError(f'{path} has no {", ".join(sorted(missing))} column')
+                return [(f'line:{reader.line_num}', row) for row in reader]
+        except OSError as e:
+            raise CommandError(e)
+
+    def handle(self, *args, **options):
+        model, deduplicator, fields = MODELS[options['model']]
+        started = time.monotonic()
+        finder = deduplicator(options['threshold'])
+
+        if options['file']:
+            records = self.read_file(options['file'], fields)
+            if options['against_db']:
+                stored = model.objects.values('id', *fields).iterator()
+                records = [(f'id:{row.pop("id")}', row) for row in stored] + records
+        else:
+            stored = model.objects.order_by('id').values('id', *fields).iterator()
+            records = ((row.pop('id'), row) for row in stored)
+
+        clusters = finder.clusters(records)
+        if options['file']:
+            # Clusters made only of stored rows are not news for an import
+            clusters = [c for c in clusters if any(i.startswith('line:') for i in c)]
+
+        for cluster in clusters:
+            self.stdout.write(' '.join(str(i) for i in cluster))
+        self.stderr.write(
+            f'{len(finder.prepared)} records, {len(clusters)} duplicate clusters '
+            f'in {time.monotonic() - started:.1f}s'
+        )
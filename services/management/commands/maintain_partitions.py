@@ -0,0 +1,62 @@
+import os
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from contratista_be import partitioning
+
+
+class Command(BaseCommand):
+    help = (
+        'Create upcoming monthly partitions of the tables in '
+        'settings.PARTITIONED_TABLES and detach, archive and drop the '
+        'partitions past their retention. Celery beat runs the same '
+        'maintenance as services.tasks.maintain_partitions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tables', nargs='*',
+            help='Tables to maintain (default: all partitioned tables)',
+        )
+        parser.add_argument(
+            '--ahead', type=int, default=3,
+            help='Months of partitions to create ahead of the current one (default: 3)',
+        )
+        parser.add_argument(
+            '--archive-dir', default=settings.PARTITION_ARCHIVE_DIR,
+            help='Directory for the gzipped CSV archives (default: PARTITION_ARCHIVE_DIR)',
+        )
+        parser.add_argument(
+            '--detach-only', action='store_true',
+            help='Detach expired partitions but keep them as standalone tables',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only print what would be done',
+        )
+
+    def handle(self, *args, **options):
+        tables = options['tables'] or sorted(settings.PARTITIONED_TABLES)
+        unknown = set(tables) - set(settings.PARTITIONED_TABLES)
+        if unknown:
+            raise CommandError(f'Not partitioned: {", ".join(sorted(unknown))}')
+        if options['archive_dir'] and not (options['dry_run'] or options['detach_only']):
+            os.makedirs(options['archive_dir'], exist_ok=True)
+
+        now = timezone.now()
+        for table in tables:
+            try:
+                actions = partitioning.maintain(
+                    table, now,
+                    ahead=options['ahead'],
+                    archive_dir=options['archive_dir'],
+                    detach_only=options['detach_only'],
+                    dry_run=options['dry_run'],
+                )
+            except ImproperlyConfigured as e:
+                raise CommandError(f'{e} (or pass --archive-dir)')
+            for action, target in actions:
+                self.stdout.write(f'{action:<8} {target}')
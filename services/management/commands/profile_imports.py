@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+SETUP_SNIPPET = (
+    'import django; django.setup()\n'
+    'for name in {modules!r}:\n'
+    '    __import__(name)\n'
+)
+
+
+def parse_importtime(output):
+    """
+    Parse `python -X importtime` output into (module, self_us, cumulative_us)
+    tuples, keeping the indentation-stripped module name.
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            self_us, cumulative_us, module = line[len('import time:'):].split('|')
+            rows.append((module.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            # The header line
+            continue
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Report the import cost of starting Django, per module, by running '
+        'django.setup() in a fresh interpreter with -X importtime.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'modules', nargs='*',
+            help='Extra modules to import after django.setup(), e.g. services.tasks',
+        )
+        parser.add_argument(
+            '--limit', type=int, default=25,
+            help='Number of modules to show (default: 25)',
+        )
+        parser.add_argument(
+            '--sort', choices=('cumulative', 'self'), default='cumulative',
+            help='Column to sort by (default: cumulative)',
+        )
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'contratista_be.settings')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             SETUP_SNIPPET.format(modules=options['modules'])],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        rows = parse_importtime(result.stderr)
+        if result.returncode or not rows:
+            lines = [
+                line for line in result.stderr.strip().splitlines()
+                if not line.startswith('import time:')
+            ]
+            raise CommandError(lines[-1] if lines else 'No import data')
+
+        total = sum(self_us for _, self_us, _ in rows)
+        column = 1 if options['sort'] == 'self' else 2
+        rows.sort(key=lambda row: row[column], reverse=True)
+
+        self.stdout.write(f'{"self ms":>10} {"cumul ms":>10}  module')
+        for module, self_us, cumulative_us in rows[:options['limit']]:
+            self.stdout.write(f'{self_us / 1000:>10.1f} {cumulative_us / 1000:>10.1f}  {module}')
+        self.stdout.write(f'{len(rows)} modules, {total / 1000:.1f} ms total')
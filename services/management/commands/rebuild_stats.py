@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from services import stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the materialized marketplace statistics from scratch and '
+        'correct any drift from writes that bypassed model signals, such as '
+        'queryset.update() and bulk_create().'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-drift', action='store_true',
+            help='Print every corrected (dimension, key) with its correction',
+        )
+
+    def handle(self, *args, **options):
+        drift = stats.rebuild()
+        if options['verbose_drift']:
+            for (dimension, key), delta in sorted(drift.items()):
+                self.stdout.write(f'{dimension:<12} {key:<40} {delta:+d}')
+        self.stdout.write(f'Corrected {len(drift)} statistics')
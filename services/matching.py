@@ -0,0 +1,275 @@
+"""
+In-process vendor matching.
+
+VendorIndex keeps every locatable vendor in parallel NumPy arrays (id,
+category, latitude, longitude) so "top-N vendors for a category near a
+point" is answered with a vectorized filter and distance ranking instead
+of ORM queries. One index is built lazily per worker process and kept
+current by the signal handlers in services.signals once the writing
+transaction commits. Once it is older than settings.VENDOR_INDEX_MAX_AGE
+a replacement is built from the database in a background thread, which
+picks up changes made by other processes, while requests keep using the
+current one.
+"""
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from .models import Address
+
+EARTH_RADIUS_KM = 6371.0088
+NO_CATEGORY = -1
+
+
+class VendorIndex:
+    def __init__(self, capacity=1024):
+        self._lock = threading.Lock()
+        self._size = 0
+        self._rows = {}
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._categories = np.empty(capacity, dtype=np.int32)
+        self._lat = np.empty(capacity, dtype=np.float32)
+        self._lng = np.empty(capacity, dtype=np.float32)
+        self.built_at = time.monotonic()
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, vendor_id):
+        return vendor_id in self._rows
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self._ids, self._categories, self._lat, self._lng))
+
+    def _grow(self, needed):
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ('_ids', '_categories', '_lat', '_lng'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def upsert(self, vendor_id, category_id, latitude, longitude):
+        """
+        Add a vendor or update its category and location.
+        """
+        if category_id is None:
+            category_id = NO_CATEGORY
+        with self._lock:
+            row = self._rows.get(vendor_id)
+            if row is None:
+                self._grow(self._size + 1)
+                row = self._size
+                self._size += 1
+                self._rows[vendor_id] = row
+                self._ids[row] = vendor_id
+            self._categories[row] = category_id
+            self._lat[row] = latitude
+            self._lng[row] = longitude
+
+    def remove(self, vendor_id):
+        """
+        Drop a vendor, moving the last row into its slot.
+        """
+        with self._lock:
+            row = self._rows.pop(vendor_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                moved_id = int(self._ids[last])
+                for a in (self._ids, self._categories, self._lat, self._lng):
+                    a[row] = a[last]
+                self._rows[moved_id] = row
+            self._size = last
+
+    def in_category(self, category_id):
+        """
+        Ids of the indexed vendors in the category.
+        """
+        with self._lock:
+            n = self._size
+            return [int(i) for i in self._ids[:n][self._categories[:n] == category_id]]
+
+    def extend(self, rows):
+        """
+        Bulk load (vendor_id, category_id, latitude, longitude) rows.
+        Vendors already in the index are updated in place.
+        """
+        fresh = []
+        for vendor_id, category_id, latitude, longitude in rows:
+            if vendor_id in self._rows:
+                self.upsert(vendor_id, category_id, latitude, longitude)
+            else:
+                fresh.append((vendor_id,
+                              NO_CATEGORY if category_id is None else category_id,
+                              latitude, longitude))
+        if not fresh:
+            return
+        ids, categories, lat, lng = zip(*fresh)
+        with self._lock:
+            start, end = self._size, self._size + len(fresh)
+            self._grow(end)
+            self._ids[start:end] = ids
+            self._categories[start:end] = categories
+            self._lat[start:end] = lat
+            self._lng[start:end] = lng
+            self._rows.update(zip(ids, range(start, end)))
+            self._size = end
+
+    def nearest(self, category_id, latitude, longitude, limit=10, radius_km=None):
+        """
+        Return up to `limit` (vendor_id, distance_km) pairs for vendors in
+        the category, closest first, optionally within `radius_km`.
+        """
+        with self._lock:
+            n = self._size
+            mask = self._categories[:n] == category_id
+            ids = self._ids[:n][mask]
+            lat = np.radians(self._lat[:n][mask], dtype=np.float64)
+            lng = np.radians(self._lng[:n][mask], dtype=np.float64)
+        if not len(ids):
+            return []
+        lat0, lng0 = np.radians(latitude), np.radians(longitude)
+        # Haversine distance
+        a = (np.sin((lat - lat0) / 2) ** 2
+             + np.cos(lat0) * np.cos(lat) * np.sin((lng - lng0) / 2) ** 2)
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        if radius_km is not None:
+            within = distances <= radius_km
+            ids, distances = ids[within], distances[within]
+        if len(ids) > limit:
+            top = np.argpartition(distances, limit)[:limit]
+            ids, distances = ids[top], distances[top]
+        order = np.argsort(distances, kind='stable')
+        return [(int(i), float(d)) for i, d in zip(ids[order], distances[order])]
+
+
+def vendor_rows(vendor_ids=None):
+    """
+    (vendor_id, category_id, latitude, longitude) for vendors located by
+    a geocoded primary address.
+    """
+    addresses = Address.objects.filter(
+        is_primary=True,
+        owner__vendor_info__isnull=False,
+        latitude__isnull=False,
+        longitude__isnull=False,
+    )
+    if vendor_ids is not None:
+        addresses = addresses.filter(owner__vendor_info__in=vendor_ids)
+    return addresses.values_list(
+        'owner__vendor_info__id',
+        'owner__vendor_info__career__categorical_name__id',
+        'latitude',
+        'longitude',
+    ).iterator()
+
+
+_index = None
+_index_lock = threading.Lock()
+# Vendors refreshed while a replacement index is being built, re-read
+# into it before it is swapped in; None when no rebuild is running
+_pending = None
+_rebuild_thread = None
+
+
+def build_vendor_index():
+    index = VendorIndex()
+    index.extend(vendor_rows())
+    return index
+
+
+def rebuild_vendor_index():
+    """
+    Build a new index from the database and swap it in. Vendors refreshed
+    in the meantime are re-read into the new index first, so it does not
+    miss their changes.
+    """
+    global _index, _pending
+    with _index_lock:
+        _pending = set()
+    try:
+        index = build_vendor_index()
+        while True:
+            with _index_lock:
+                vendor_ids, _pending = _pending, set()
+                if not vendor_ids:
+                    _index = index
+                    return index
+            _refresh(index, vendor_ids)
+    finally:
+        with _index_lock:
+            _pending = None
+
+
+def _rebuild_in_background():
+    try:
+        rebuild_vendor_index()
+    finally:
+        connection.close()
+
+
+def get_vendor_index():
+    """
+    The worker's VendorIndex. It is built from the database on first use;
+    once older than settings.VENDOR_INDEX_MAX_AGE seconds it keeps being
+    served while a background thread builds its replacement.
+    """
+    global _index, _rebuild_thread
+    index = _index
+    if index is None:
+        with _index_lock:
+            if _index is None:
+                _index = build_vendor_index()
+            return _index
+    if time.monotonic() - index.built_at > settings.VENDOR_INDEX_MAX_AGE:
+        with _index_lock:
+            if _rebuild_thread is None or not _rebuild_thread.is_alive():
+                _rebuild_thread = threading.Thread(
+                    target=_rebuild_in_background, name='vendor-index-rebuild', daemon=True)
+                _rebuild_thread.start()
+    return index
+
+
+def _refresh(index, vendor_ids, category_id=None):
+    vendor_ids = set(vendor_ids)
+    if category_id is not None:
+        vendor_ids.update(index.in_category(category_id))
+    for row in vendor_rows(vendor_ids):
+        index.upsert(*row)
+        vendor_ids.discard(row[0])
+    for vendor_id in vendor_ids:
+        index.remove(vendor_id)
+
+
+def refresh_vendors(vendor_ids, category_id=None):
+    """
+    Re-read the given vendors, and those indexed under `category_id`, into
+    the worker's index, if it has been built; vendors that are no longer
+    locatable are dropped.
+    """
+    vendor_ids = set(vendor_ids)
+    with _index_lock:
+        index = _index
+        if index is None:
+            return
+        if _pending is not None:
+            _pending.update(vendor_ids)
+            if category_id is not None:
+                _pending.update(index.in_category(category_id))
+    _refresh(index, vendor_ids, category_id)
+
+
+def reset_vendor_index():
+    global _index
+    with _index_lock:
+        _index = None
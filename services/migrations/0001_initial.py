@@ -0,0 +1,162 @@
+# Generated by Django 2.2.28 on 2026-10-19 18:28
+
+from django.conf import settings
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+import services.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Address',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('full_name', models.CharField(max_length=100)),
+                ('state_province_region', models.CharField(blank=True, max_length=50)),
+                ('city', models.CharField(blank=True, max_length=50)),
+                ('sector', models.CharField(blank=True, max_length=50)),
+                ('country', models.CharField(default='Dominican Republic', max_length=200)),
+                ('address_line_one', models.CharField(max_length=150)),
+                ('address_line_two', models.CharField(blank=True, max_length=150)),
+                ('phone_number', models.CharField(max_length=14)),
+                ('is_primary', models.BooleanField(default=False, editable=False)),
+                ('latlng', django.contrib.postgres.fields.jsonb.JSONField(blank=True, editable=False, null=True)),
+                ('formatted_name', models.CharField(blank=True, editable=False, max_length=500)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Career',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('industry', models.CharField(max_length=50, unique=True)),
+                ('trade_name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('slug', models.SlugField(blank=True, editable=False, unique=True)),
+                ('description', models.CharField(max_length=255, unique=True)),
+                ('career', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='categorical_name', to='services.Career')),
+            ],
+            options={
+                'verbose_name': 'category',
+                'verbose_name_plural': 'categories',
+            },
+        ),
+        migrations.CreateModel(
+            name='Company',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rnc', models.CharField(max_length=9, unique=True)),
+                ('name', models.CharField(max_length=150)),
+                ('slug', models.SlugField(blank=True, default='', editable=False)),
+                ('logo', models.ImageField(blank=True, null=True, upload_to=services.models.company_directory_path)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'company',
+                'verbose_name_plural': 'companies',
+            },
+        ),
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=50)),
+                ('last_name', models.CharField(max_length=50)),
+                ('display_name', models.CharField(blank=True, max_length=125, null=True)),
+                ('primary_phone', models.CharField(max_length=14)),
+                ('secondary_phone', models.CharField(blank=True, max_length=14)),
+                ('registered_at', models.DateTimeField(auto_now_add=True)),
+                ('picture', models.ImageField(blank=True, null=True, upload_to=services.models.customer_directory_path)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='customer', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'customer',
+                'verbose_name_plural': 'customers',
+            },
+        ),
+        migrations.CreateModel(
+            name='Institution',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('short_name', models.CharField(max_length=15, unique=True)),
+                ('long_name', models.CharField(max_length=150, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Vendor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('career', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='vendors', to='services.Career')),
+                ('company', models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='members', to='services.Company')),
+                ('customer', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='vendor_info', to='services.Customer')),
+            ],
+            options={
+                'verbose_name': 'vendor information',
+                'verbose_name_plural': 'vendors information',
+            },
+        ),
+        migrations.CreateModel(
+            name='NationalId',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('id_type', models.IntegerField(choices=[(0, 'Cedula'), (1, 'Passport'), (2, 'Social Security Number')], default=0, verbose_name='ID Type: Cedula, SSN, Passport')),
+                ('id_number', models.CharField(max_length=15)),
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='national_id', to='services.Customer')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_title', models.CharField(max_length=50)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='services.Category')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GeocodeOutbox',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dispatched_at', models.DateTimeField(blank=True, default=None, null=True)),
+                ('address', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='geocode_outbox', to='services.Address')),
+            ],
+            options={
+                'verbose_name': 'geocode outbox entry',
+                'verbose_name_plural': 'geocode outbox entries',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='created_by',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='creator_of', to='services.Customer'),
+        ),
+        migrations.AddField(
+            model_name='career',
+            name='institution',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='careers', to='services.Institution'),
+        ),
+        migrations.AddField(
+            model_name='address',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='addresses', to='services.Customer'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='company',
+            unique_together={('rnc', 'name')},
+        ),
+    ]
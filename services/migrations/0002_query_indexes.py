@@ -0,0 +1,32 @@
+# Generated by Django 2.2.28 on 2026-10-19 18:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['registered_at'], name='services_customer_reg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='geocodeoutbox',
+            index=models.Index(condition=models.Q(dispatched_at__isnull=True), fields=['id'], name='services_outbox_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='address',
+            constraint=models.UniqueConstraint(condition=models.Q(is_primary=True), fields=('owner',), name='services_address_one_primary'),
+        ),
+        # Covering index for KYC lookups by (id_type, id_number); INCLUDE
+        # lets the owner be read with an index-only scan. Needs PostgreSQL 11+.
+        migrations.RunSQL(
+            sql='CREATE INDEX services_nationalid_lookup_idx '
+                'ON services_nationalid (id_type, id_number) INCLUDE (owner_id);',
+            reverse_sql='DROP INDEX services_nationalid_lookup_idx;',
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 2.2.28 on 2026-10-19 18:30
+
+import json
+
+from django.db import migrations, models
+
+
+def latlng_to_coordinates(apps, schema_editor):
+    # enqueue_address stored json.dumps() output in the JSONField, so the
+    # value may be a JSON-encoded string rather than an object.
+    Address = apps.get_model('services', 'Address')
+    for address in Address.objects.exclude(latlng__isnull=True).iterator():
+        latlng = address.latlng
+        if isinstance(latlng, str):
+            latlng = json.loads(latlng)
+        try:
+            latitude, longitude = float(latlng['lat']), float(latlng['lng'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        Address.objects.filter(pk=address.pk).update(
+            latitude=latitude, longitude=longitude)
+
+
+def coordinates_to_latlng(apps, schema_editor):
+    Address = apps.get_model('services', 'Address')
+    addresses = Address.objects.filter(
+        latitude__isnull=False, longitude__isnull=False)
+    for address in addresses.iterator():
+        Address.objects.filter(pk=address.pk).update(
+            latlng={'lat': address.latitude, 'lng': address.longitude})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='address',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='address',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(latlng_to_coordinates, coordinates_to_latlng),
+        migrations.RemoveField(
+            model_name='address',
+            name='latlng',
+        ),
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['latitude', 'longitude'], name='services_address_latlng_idx'),
+        ),
+    ]
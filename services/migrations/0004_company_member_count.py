@@ -0,0 +1,40 @@
+# Generated by Django 2.2.28 on 2026-10-19 18:38
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_members(apps, schema_editor):
+    Company = apps.get_model('services', 'Company')
+    Vendor = apps.get_model('services', 'Vendor')
+    counts = (
+        Vendor.objects
+        .filter(company=OuterRef('pk'))
+        .order_by()
+        .values('company')
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    Company.objects.update(
+        member_count=Coalesce(Subquery(counts, output_field=models.IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0003_address_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_members, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['-member_count', 'id'], name='services_company_size_idx'),
+        ),
+    ]
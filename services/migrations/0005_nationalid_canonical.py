@@ -0,0 +1,76 @@
+# Generated by Django 2.2.28 on 2026-10-19 18:40
+
+from django.db import IntegrityError, migrations, models
+from django.db.models import Q
+
+# Same normalization as services.national_ids.normalize(), frozen here:
+# upper-case letters and digits for passports (id_type 1), digits only
+# for cedulas and SSNs.
+FILL_CANONICAL_SQL = r"""
+UPDATE services_nationalid SET id_number_canonical = CASE
+    WHEN id_type = 1 THEN regexp_replace(upper(id_number), '[^0-9A-Z]', '', 'g')
+    ELSE regexp_replace(id_number, '[^0-9]', '', 'g')
+END;
+"""
+
+
+def check_duplicates(apps, schema_editor):
+    """
+    Stop before adding the unique constraint if two IDs normalize to the
+    same number, listing them so they can be merged or corrected by hand.
+    Empty canonical numbers (placeholders such as 'N/A') are left out of
+    the constraint instead.
+    """
+    NationalId = apps.get_model('services', 'NationalId')
+    numbered = NationalId.objects.exclude(id_number_canonical='')
+    shared = (
+        numbered
+        .values('id_type', 'id_number_canonical')
+        .annotate(n=models.Count('id'))
+        .filter(n__gt=1)
+        .values_list('id_type', 'id_number_canonical')
+    )
+    duplicates = {
+        (id_type, canonical): [
+            f'{pk} ({number!r})' for pk, number in
+            numbered.filter(id_type=id_type, id_number_canonical=canonical)
+            .order_by('id').values_list('id', 'id_number')
+        ]
+        for id_type, canonical in shared.order_by('id_type', 'id_number_canonical')
+    }
+    if duplicates:
+        lines = '\n'.join(
+            f'  id_type={id_type} number={canonical}: {", ".join(ids)}'
+            for (id_type, canonical), ids in duplicates.items()
+        )
+        raise IntegrityError(
+            'Cannot add services_nationalid_unique_number; these national IDs '
+            f'share a normalized number and must be merged or corrected first:\n{lines}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0004_company_member_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nationalid',
+            name='id_number_canonical',
+            field=models.CharField(blank=True, editable=False, max_length=15),
+        ),
+        migrations.RunSQL(FILL_CANONICAL_SQL, migrations.RunSQL.noop),
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        # Lookups now go through the canonical column's unique index
+        migrations.RunSQL(
+            sql='DROP INDEX services_nationalid_lookup_idx;',
+            reverse_sql='CREATE INDEX services_nationalid_lookup_idx '
+                        'ON services_nationalid (id_type, id_number) INCLUDE (owner_id);',
+        ),
+        migrations.AddConstraint(
+            model_name='nationalid',
+            constraint=models.UniqueConstraint(condition=~Q(id_number_canonical=''), fields=('id_type', 'id_number_canonical'), name='services_nationalid_unique_number'),
+        ),
+    ]
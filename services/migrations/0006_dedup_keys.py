@@ -0,0 +1,94 @@
+# Generated by Django 2.2.28 on 2026-10-19 18:43
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Digits only, without the +1 NANP country code, as
+# services.dedup.normalize_phone() computes it
+FILL_PHONE_KEYS_SQL = r"""
+UPDATE services_customer
+SET phone_key = regexp_replace(regexp_replace(primary_phone, '[^0-9]', '', 'g'), '^1(\d{10})$', '\1');
+"""
+
+# Frozen copy of services.dedup.address_key() as of this migration
+ABBREVIATIONS = {
+    'c': 'calle',
+    'cl': 'calle',
+    'av': 'avenida',
+    'ave': 'avenida',
+    'aut': 'autopista',
+    'no': 'numero',
+    'num': 'numero',
+    'esq': 'esquina',
+    'apto': 'apartamento',
+    'apt': 'apartamento',
+    'edif': 'edificio',
+    'res': 'residencial',
+    'urb': 'urbanizacion',
+    'sto': 'santo',
+    'dgo': 'domingo',
+}
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+BATCH_SIZE = 1000
+
+
+def address_key(formatted_name):
+    text = unicodedata.normalize('NFKD', formatted_name or '')
+    text = text.encode('ascii', 'ignore').decode('ascii').lower()
+    return ' '.join(sorted({ABBREVIATIONS.get(t, t) for t in _NON_ALNUM.split(text) if t}))
+
+
+def fill_name_keys(apps, schema_editor):
+    Address = apps.get_model('services', 'Address')
+    rows = Address.objects.order_by('id').values_list('id', 'formatted_name').iterator()
+    with schema_editor.connection.cursor() as cursor:
+        batch = []
+        for pk, formatted_name in rows:
+            batch.append((pk, address_key(formatted_name)))
+            if len(batch) == BATCH_SIZE:
+                update_name_keys(cursor, batch)
+                batch = []
+        if batch:
+            update_name_keys(cursor, batch)
+
+
+def update_name_keys(cursor, batch):
+    values = ', '.join(['(%s, %s)'] * len(batch))
+    cursor.execute(
+        f'UPDATE services_address a SET name_key = v.key '
+        f'FROM (VALUES {values}) AS v(id, key) WHERE a.id = v.id',
+        [value for row in batch for value in row]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0005_nationalid_canonical'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='address',
+            name='name_key',
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='phone_key',
+            field=models.CharField(blank=True, editable=False, max_length=14),
+        ),
+        migrations.RunSQL(FILL_PHONE_KEYS_SQL, migrations.RunSQL.noop),
+        migrations.RunPython(fill_name_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['name_key'], name='services_address_name_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['phone_key'], name='services_customer_phone_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from contratista_be import partitioning
+
+
+def partition(apps, schema_editor):
+    partitioning.to_partitioned(schema_editor, 'services_geocodeoutbox', 'created_at')
+
+
+def unpartition(apps, schema_editor):
+    partitioning.to_plain(schema_editor, 'services_geocodeoutbox', 'created_at')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0006_dedup_keys'),
+    ]
+
+    operations = [
+        # The primary key becomes (id, created_at) in the database; ids
+        # still come from the same sequence, so Django keeps using id alone.
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 2.2.28 on 2026-10-19 18:58
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import TruncDate
+
+
+def normalize(value):
+    return ' '.join((value or '').split())
+
+
+def fill_stats(apps, schema_editor):
+    """
+    Count the existing marketplace into StatCount and VendorStatSnapshot
+    the way services.stats.compute() does as of this migration, so the
+    signal handlers apply their deltas to complete counts.
+    """
+    Address = apps.get_model('services', 'Address')
+    Customer = apps.get_model('services', 'Customer')
+    Vendor = apps.get_model('services', 'Vendor')
+    StatCount = apps.get_model('services', 'StatCount')
+    VendorStatSnapshot = apps.get_model('services', 'VendorStatSnapshot')
+
+    primary = Address.objects.filter(owner=OuterRef('customer_id'), is_primary=True)
+    vendors = Vendor.objects.order_by('id').annotate(
+        primary_city=Subquery(primary.values('city')),
+        primary_sector=Subquery(primary.values('sector')),
+    ).values_list(
+        'id',
+        'career_id',
+        'career__categorical_name__id',
+        'career__institution_id',
+        'primary_city',
+        'primary_sector',
+    )
+    counts = Counter()
+    snapshots = []
+    for vendor_id, career_id, category_id, institution_id, city, sector in vendors.iterator():
+        city, sector = normalize(city), normalize(sector)
+        for dimension, value in (('career', career_id), ('category', category_id),
+                                 ('institution', institution_id)):
+            if value is not None:
+                counts[(dimension, str(value))] += 1
+        if city:
+            counts[('city', city)] += 1
+        if sector:
+            counts[('sector', f'{city}, {sector}' if city else sector)] += 1
+        snapshots.append(VendorStatSnapshot(
+            vendor_id=vendor_id, career_id=career_id, category_id=category_id,
+            institution_id=institution_id, city=city, sector=sector))
+
+    signups = (
+        Customer.objects.annotate(day=TruncDate('registered_at'))
+        .values('day').annotate(n=Count('id')).values_list('day', 'n')
+    )
+    for day, n in signups:
+        counts[('signups', day.isoformat())] = n
+
+    StatCount.objects.bulk_create(
+        (StatCount(dimension=dimension, key=key, count=count)
+         for (dimension, key), count in sorted(counts.items())),
+        batch_size=1000
+    )
+    VendorStatSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0007_partition_geocode_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=20)),
+                ('key', models.CharField(max_length=255)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VendorStatSnapshot',
+            fields=[
+                ('vendor_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('career_id', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('category_id', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('institution_id', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('city', models.CharField(blank=True, max_length=50)),
+                ('sector', models.CharField(blank=True, max_length=50)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='statcount',
+            constraint=models.UniqueConstraint(fields=('dimension', 'key'), name='services_statcount_unique_key'),
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
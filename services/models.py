@@ -1,9 +1,13 @@
-import googlemaps
+import json
 from django.conf import settings
-from django.contrib.postgres.fields import JSONField
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
 
+from . import dedup, national_ids
+
 def company_directory_path(instance, filename):
     return f'companies/company_{instance.id}/{filename}'
 
@@ -17,6 +21,8 @@ class Customer(models.Model):
     display_name = models.CharField(max_length=125, blank=True, null=True)
     primary_phone = models.CharField(max_length=14, blank=False)
     secondary_phone = models.CharField(max_length=14, blank=True)
+    # Normalized primary_phone, the blocking key for duplicate detection
+    phone_key = models.CharField(max_length=14, blank=True, editable=False)
     registered_at = models.DateTimeField(auto_now_add=True)
     picture = models.ImageField(
         upload_to=customer_directory_path,
@@ -33,6 +39,10 @@ class Customer(models.Model):
     class Meta:
         verbose_name = 'customer'
         verbose_name_plural = 'customers'
+        indexes = [
+            models.Index(fields=['registered_at'], name='services_customer_reg_idx'),
+            models.Index(fields=['phone_key'], name='services_customer_phone_idx'),
+        ]
 
 
     def save(self, *args, **kwargs):
@@ -42,6 +52,7 @@ class Customer(models.Model):
     def clean(self, *args, **kwargs):
         if self.display_name is None:
             self.display_name = f'{self.first_name} {self.last_name}'
+        self.phone_key = dedup.normalize_phone(self.primary_phone)
         super(Customer, self).clean(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
@@ -80,6 +91,15 @@ class Vendor(models.Model):
         verbose_name = 'vendor information'
         verbose_name_plural = 'vendors information'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(Vendor, cls).from_db(db, field_names, values)
+        # Lets the member_count signal handlers see company moves. Vendors
+        # loaded without company_id (e.g. with .only()) are not counted.
+        if 'company_id' in field_names:
+            instance._loaded_company_id = instance.company_id
+        return instance
+
 
 class Career(models.Model):
     industry = models.CharField(max_length=50, unique=True)
@@ -138,10 +158,33 @@ class Job(models.Model):
     )
 
 
+class NationalIdQuerySet(models.QuerySet):
+    def lookup(self, id_type, number):
+        """
+        Exact match on the canonical form of `number`, served by the
+        (id_type, id_number_canonical) unique index.
+        """
+        return self.filter(
+            id_type=id_type,
+            id_number_canonical=national_ids.normalize(id_type, number)
+        )
+
+    def existing(self, id_type, numbers):
+        """
+        The canonical numbers among `numbers` that are already registered,
+        in a single query; used to flag duplicates in bulk imports.
+        """
+        canonical = {national_ids.normalize(id_type, n) for n in numbers}
+        return set(
+            self.filter(id_type=id_type, id_number_canonical__in=canonical)
+            .values_list('id_number_canonical', flat=True)
+        )
+
+
 class NationalId(models.Model):
-    CEDULA = 0
-    PASSPORT = 1
-    SSN = 2
+    CEDULA = national_ids.CEDULA
+    PASSPORT = national_ids.PASSPORT
+    SSN = national_ids.SSN
     ID_TYPE_CHOICES = (
         (CEDULA, 'Cedula'),
         (PASSPORT, 'Passport'),
@@ -153,19 +196,60 @@ class NationalId(models.Model):
         verbose_name='ID Type: Cedula, SSN, Passport'
     )
     id_number = models.CharField(max_length=15, blank=False)
+    id_number_canonical = models.CharField(max_length=15, blank=True, editable=False)
     owner = models.OneToOneField(
         'services.Customer',
         related_name='national_id',
         on_delete=models.CASCADE
     )
 
+    objects = NationalIdQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['id_type', 'id_number_canonical'],
+                # Legacy placeholders such as 'N/A' normalize to ''
+                condition=~Q(id_number_canonical=''),
+                name='services_nationalid_unique_number'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.full_clean()
+        super(NationalId, self).save(*args, **kwargs)
+
+    def clean(self, *args, **kwargs):
+        self.id_number_canonical = national_ids.normalize(self.id_type, self.id_number)
+        if not national_ids.is_valid(self.id_type, self.id_number_canonical):
+            raise ValidationError({
+                'id_number': f'Not a valid {self.get_id_type_display()} number.'
+            })
+        # validate_unique() skips the constraint because it is conditional
+        duplicate = NationalId.objects.filter(
+            id_type=self.id_type, id_number_canonical=self.id_number_canonical
+        ).exclude(pk=self.pk)
+        if duplicate.exists():
+            raise ValidationError({
+                'id_number': f'This {self.get_id_type_display()} number is already registered.'
+            })
+        super(NationalId, self).clean(*args, **kwargs)
+
     def __str__(self):
-        if self.id_type == 0:
-            return f'{self.id_number[:3]}-{self.id_number[3:10]}-{self.id_number[-1:]}'
-        elif self.id_type == 1:
-            return f'{self.id_number}'
-        elif self.id_type == 2:
-            return f'{self.id_number[:3]}-{self.id_number[3:5]}-{self.id_number[-4:]}'
+        return national_ids.format_number(
+            self.id_type, national_ids.normalize(self.id_type, self.id_number))
+
+
+class AddressQuerySet(models.QuerySet):
+    def within_bounds(self, south, west, north, east):
+        """
+        Addresses whose coordinates fall inside the given bounding box,
+        served by the (latitude, longitude) index.
+        """
+        return self.filter(
+            latitude__range=(south, north),
+            longitude__range=(west, east),
+        )
 
 
 class Address(models.Model):
@@ -178,17 +262,73 @@ class Address(models.Model):
     address_line_two = models.CharField(max_length=150, blank=True)
     phone_number = models.CharField(max_length=14, blank=False)
     is_primary = models.BooleanField(default=False, editable=False)
-    latlng = JSONField(blank=True, editable=False, null=True) # psql version
+    latitude = models.FloatField(blank=True, editable=False, null=True)
+    longitude = models.FloatField(blank=True, editable=False, null=True)
     formatted_name = models.CharField(max_length=500, blank=True, editable=False)
+    # Sorted normalized tokens of formatted_name, see services.dedup
+    name_key = models.CharField(max_length=500, blank=True, editable=False)
     owner = models.ForeignKey(
         'services.Customer',
         related_name='addresses',
         on_delete=models.CASCADE
     )
 
+    objects = AddressQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['owner'],
+                condition=models.Q(is_primary=True),
+                name='services_address_one_primary'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='services_address_latlng_idx'),
+            models.Index(fields=['name_key'], name='services_address_name_key_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(Address, cls).from_db(db, field_names, values)
+        instance._loaded_formatted_name = instance.__dict__.get('formatted_name')
+        return instance
+
     def save(self, *args, **kwargs):
         self.full_clean()
-        super(Address, self).save(*args, **kwargs)
+        # The post_save handler writes the geocode outbox row; keep both
+        # writes in the same transaction so neither outlives a rollback.
+        with transaction.atomic(using=kwargs.get('using')):
+            super(Address, self).save(*args, **kwargs)
+        self._loaded_formatted_name = self.formatted_name
+
+    @property
+    def latlng(self):
+        """
+        Coordinates in the googlemaps {'lat': ..., 'lng': ...} form, or
+        None if the address has not been geocoded yet.
+        """
+        if self.latitude is None or self.longitude is None:
+            return None
+        return {'lat': self.latitude, 'lng': self.longitude}
+
+    @latlng.setter
+    def latlng(self, value):
+        if isinstance(value, str):
+            value = json.loads(value)
+        if value is None:
+            self.latitude = self.longitude = None
+        else:
+            self.latitude = float(value['lat'])
+            self.longitude = float(value['lng'])
+
+    @property
+    def needs_geocoding(self):
+        """
+        True when the address is new or its formatted name changed since
+        it was loaded, i.e. when the stored coordinates may be stale.
+        """
+        return self.formatted_name != getattr(self, '_loaded_formatted_name', None)
 
     def clean(self, *args, **kwargs):
         self.formatted_name = ', '.join((
@@ -198,12 +338,61 @@ class Address(models.Model):
             f'{self.state_province_region}',
             f'{self.country}'
         ))
+        self.name_key = dedup.address_key(self.formatted_name)
         super(Address, self).clean(*args, **kwargs)
 
     def __str__(self):
         return f'{self.owner.display_name}: address_{self.id}'
 
 
+class GeocodeOutbox(models.Model):
+    """
+    Pending geocode jobs, written in the same transaction as the Address
+    that needs them and published to the broker by
+    services.tasks.relay_geocode_outbox.
+    """
+    address = models.ForeignKey(
+        'services.Address',
+        related_name='geocode_outbox',
+        on_delete=models.CASCADE
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(blank=True, null=True, default=None)
+
+    class Meta:
+        verbose_name = 'geocode outbox entry'
+        verbose_name_plural = 'geocode outbox entries'
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(dispatched_at__isnull=True),
+                name='services_outbox_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'address_{self.address_id}: outbox_{self.id}'
+
+
+class CompanyQuerySet(models.QuerySet):
+    def refresh_member_counts(self):
+        """
+        Recompute the cached member_count from Vendor rows, e.g. after
+        bulk operations that bypass the signal handlers.
+        """
+        counts = (
+            Vendor.objects
+            .filter(company=OuterRef('pk'))
+            .order_by()
+            .values('company')
+            .annotate(total=Count('*'))
+            .values('total')
+        )
+        return self.update(
+            member_count=Coalesce(Subquery(counts, output_field=models.IntegerField()), 0))
+
+
 class Company(models.Model):
     rnc = models.CharField(max_length=9, blank=False, unique=True)
     name = models.CharField(max_length=150, blank=False)
@@ -220,6 +409,10 @@ class Company(models.Model):
         on_delete=models.SET_NULL,
         null=True
     )
+    # Maintained by the Vendor signal handlers in services.signals
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CompanyQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'company'
@@ -227,6 +420,9 @@ class Company(models.Model):
         unique_together = (
             ('rnc', 'name')
         )
+        indexes = [
+            models.Index(fields=['-member_count', 'id'], name='services_company_size_idx'),
+        ]
 
     def delete(self, *args, **kwargs):
         self.logo.delete(save=False)
@@ -236,6 +432,51 @@ class Company(models.Model):
         self.full_clean()
         super(Company, self).save(*args, **kwargs)
 
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # Never write back a possibly stale member_count over an existing
+        # row; if the row is gone, save() still inserts it in full.
+        values = [value for value in values if value[0].name != 'member_count']
+        return super(Company, self)._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update)
+
     def clean(self, *args, **kwargs):
         self.slug = slugify(self.name)
         super(Company, self).clean(*args, **kwargs)
+
+
+class StatCount(models.Model):
+    """
+    Materialized marketplace statistics: the number of vendors (or, for
+    the signups dimension, customers) per key of a dimension. Maintained
+    by services.stats from model signals; see stats.rebuild() for the
+    reconciliation.
+    """
+    dimension = models.CharField(max_length=20)
+    key = models.CharField(max_length=255)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dimension', 'key'],
+                name='services_statcount_unique_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.dimension} {self.key}: {self.count}'
+
+
+class VendorStatSnapshot(models.Model):
+    """
+    The dimension keys a vendor was last counted under, so a change to
+    the vendor or anything it is counted through becomes an exact diff.
+    vendor_id is deliberately not a foreign key: the snapshot has to
+    outlive the vendor's deletion to be subtracted.
+    """
+    vendor_id = models.IntegerField(primary_key=True)
+    career_id = models.IntegerField(blank=True, null=True, db_index=True)
+    category_id = models.IntegerField(blank=True, null=True, db_index=True)
+    institution_id = models.IntegerField(blank=True, null=True, db_index=True)
+    city = models.CharField(max_length=50, blank=True)
+    sector = models.CharField(max_length=50, blank=True)
@@ -0,0 +1,103 @@
+"""
+Normalization, validation and formatting of NationalId numbers.
+
+The scalar helpers are used by NationalId.clean(); validate_many() checks
+whole import batches at once with NumPy, which is imported on first use
+so loading the models does not pay for it.
+"""
+import re
+
+# Mirrors NationalId.ID_TYPE_CHOICES
+CEDULA = 0
+PASSPORT = 1
+SSN = 2
+
+CEDULA_LENGTH = 11
+SSN_LENGTH = 9
+# Weights applied to the first ten cedula digits (Luhn-style)
+CEDULA_WEIGHTS = (1, 2) * 5
+
+# ASCII only: \d would also keep digits such as full-width '１', which
+# int() accepts but which would give the same number a second canonical form
+_NON_DIGITS = re.compile(r'[^0-9]')
+_NON_ALNUM = re.compile(r'[^0-9A-Z]')
+_DIGITS = re.compile(r'[0-9]+')
+_ALNUM = re.compile(r'[0-9A-Z]+')
+
+
+def normalize(id_type, number):
+    """
+    Canonical form of an ID number: digits only for cedulas and SSNs,
+    upper-case letters and digits for passports.
+    """
+    if id_type == PASSPORT:
+        return _NON_ALNUM.sub('', number.upper())
+    return _NON_DIGITS.sub('', number)
+
+
+def cedula_check_digit(digits):
+    total = 0
+    for digit, weight in zip(digits, CEDULA_WEIGHTS):
+        product = int(digit) * weight
+        total += product - 9 if product > 9 else product
+    return (10 - total % 10) % 10
+
+
+def ssn_is_valid(digits):
+    area, group, serial = digits[:3], digits[3:5], digits[5:]
+    return (
+        len(digits) == SSN_LENGTH
+        and area not in ('000', '666') and not area.startswith('9')
+        and group != '00' and serial != '0000'
+    )
+
+
+def is_valid(id_type, canonical):
+    """
+    Whether a canonical number is well formed: ASCII digits (letters too
+    for passports), cedulas with a correct check digit and SSNs with a
+    valid area/group/serial.
+    """
+    if id_type == PASSPORT:
+        return 6 <= len(canonical) <= 15 and bool(_ALNUM.fullmatch(canonical))
+    if not _DIGITS.fullmatch(canonical):
+        return False
+    if id_type == CEDULA:
+        return (len(canonical) == CEDULA_LENGTH
+                and cedula_check_digit(canonical[:10]) == int(canonical[10]))
+    return ssn_is_valid(canonical)
+
+
+def validate_many(id_type, numbers):
+    """
+    Normalize and validate a batch of numbers of one type. Returns the
+    list of canonical numbers and a boolean NumPy array marking which are
+    valid. Cedula check digits are computed for the whole batch at once.
+    """
+    import numpy as np
+
+    canonical = [normalize(id_type, number) for number in numbers]
+    if id_type != CEDULA:
+        valid = np.fromiter(
+            (is_valid(id_type, c) for c in canonical), dtype=bool, count=len(canonical))
+        return canonical, valid
+
+    well_formed = np.fromiter(
+        (len(c) == CEDULA_LENGTH and bool(_DIGITS.fullmatch(c)) for c in canonical),
+        dtype=bool, count=len(canonical))
+    # Malformed rows are padded so the batch forms an (n, 11) digit matrix
+    padded = ''.join(c if ok else '0' * CEDULA_LENGTH for c, ok in zip(canonical, well_formed))
+    digits = np.frombuffer(padded.encode('ascii'), dtype=np.uint8).reshape(-1, CEDULA_LENGTH)
+    digits = digits.astype(np.int16) - ord('0')
+    products = digits[:, :10] * np.array(CEDULA_WEIGHTS, dtype=np.int16)
+    products -= 9 * (products > 9)
+    check = (10 - products.sum(axis=1) % 10) % 10
+    return canonical, well_formed & (check == digits[:, 10])
+
+
+def format_number(id_type, canonical):
+    if id_type == CEDULA:
+        return f'{canonical[:3]}-{canonical[3:10]}-{canonical[10:]}'
+    if id_type == SSN:
+        return f'{canonical[:3]}-{canonical[3:5]}-{canonical[5:]}'
+    return canonical
@@ -0,0 +1,46 @@
+from rest_framework import serializers
+
+from services.models import Company
+
+
+class CompanySerializer(serializers.ModelSerializer):
+    class Meta:
+        fields = (
+            'id',
+            'rnc',
+            'name',
+            'slug',
+            'member_count',
+            'created_at',
+        )
+        model = Company
+
+
+class CompanyDetailSerializer(CompanySerializer):
+    """
+    Company with the aggregates annotated by CompanyViewSet.get_queryset.
+    """
+    member_count = serializers.IntegerField(source='members_counted', read_only=True)
+    careers = serializers.SerializerMethodField()
+    service_area = serializers.SerializerMethodField()
+
+    class Meta(CompanySerializer.Meta):
+        fields = CompanySerializer.Meta.fields + (
+            'logo',
+            'created_by',
+            'careers',
+            'service_area',
+        )
+
+    def get_careers(self, obj):
+        return sorted(obj.careers or ())
+
+    def get_service_area(self, obj):
+        if obj.south is None:
+            return None
+        return {
+            'south': obj.south,
+            'west': obj.west,
+            'north': obj.north,
+            'east': obj.east,
+        }
@@ -1,9 +1,137 @@
-from django.db.models.signals import post_save
+import sys
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import Address
-from .tasks import enqueue_address
+from . import stats
+from .models import (
+    Address,
+    Career,
+    Category,
+    Company,
+    Customer,
+    GeocodeOutbox,
+    Institution,
+    Vendor,
+)
 
 @receiver(post_save, sender=Address)
-def start_address_latlong(sender, instance, **kwargs):
-    enqueue_address.delay(instance.id)
+def start_address_latlong(sender, instance, using=None, **kwargs):
+    if instance.needs_geocoding:
+        GeocodeOutbox.objects.using(using).create(address=instance)
+
+
+def adjust_member_count(company_id, delta):
+    if company_id is None:
+        return
+    companies = Company.objects.filter(pk=company_id)
+    if delta < 0:
+        companies = companies.filter(member_count__gte=-delta)
+    companies.update(member_count=F('member_count') + delta)
+
+
+@receiver(post_save, sender=Vendor)
+def count_company_member(sender, instance, created, **kwargs):
+    # Instances neither created nor loaded with their company have no
+    # known previous company; Company.objects.refresh_member_counts()
+    # fixes any drift.
+    if 'company_id' in instance.get_deferred_fields():
+        return
+    if created or hasattr(instance, '_loaded_company_id'):
+        previous = None if created else instance._loaded_company_id
+        if previous != instance.company_id:
+            adjust_member_count(previous, -1)
+            adjust_member_count(instance.company_id, 1)
+    instance._loaded_company_id = instance.company_id
+
+
+@receiver(post_delete, sender=Vendor)
+def uncount_company_member(sender, instance, **kwargs):
+    if hasattr(instance, '_loaded_company_id'):
+        adjust_member_count(instance._loaded_company_id, -1)
+    elif 'company_id' not in instance.get_deferred_fields():
+        adjust_member_count(instance.company_id, -1)
+
+
+def refresh_vendors(vendor_ids, category_id=None):
+    # services.matching pulls in NumPy, so it is not imported here. A
+    # process that never loaded it has no vendor index to refresh.
+    matching = sys.modules.get('services.matching')
+    if matching is None:
+        return
+    vendor_ids = list(vendor_ids)
+    # A rolled back write must not reach the index
+    transaction.on_commit(lambda: matching.refresh_vendors(vendor_ids, category_id))
+
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_delete, sender=Vendor)
+def refresh_matching_vendor(sender, instance, **kwargs):
+    refresh_vendors([instance.id])
+
+
+@receiver(post_save, sender=Address)
+@receiver(post_delete, sender=Address)
+def refresh_matching_address(sender, instance, **kwargs):
+    refresh_vendors(
+        Vendor.objects.filter(customer_id=instance.owner_id)
+        .values_list('id', flat=True)
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def refresh_matching_category(sender, instance, **kwargs):
+    # Vendors indexed under the category cover its previous career, and a
+    # deleted career's vendors, whose career was already set to NULL
+    vendor_ids = []
+    if instance.career_id is not None:
+        vendor_ids = Vendor.objects.filter(career_id=instance.career_id).values_list('id', flat=True)
+    refresh_vendors(vendor_ids, category_id=instance.id)
+
+
+@receiver(post_save, sender=Customer)
+def count_signup(sender, instance, created, **kwargs):
+    if created:
+        stats.count_signup(instance, 1)
+
+
+@receiver(post_delete, sender=Customer)
+def uncount_signup(sender, instance, **kwargs):
+    stats.count_signup(instance, -1)
+
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_delete, sender=Vendor)
+def refresh_vendor_stats(sender, instance, **kwargs):
+    stats.refresh_vendors([instance.id])
+
+
+@receiver(post_save, sender=Address)
+@receiver(post_delete, sender=Address)
+def refresh_address_stats(sender, instance, **kwargs):
+    stats.refresh_vendors(
+        Vendor.objects.filter(customer_id=instance.owner_id).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Career)
+@receiver(post_delete, sender=Career)
+def refresh_career_stats(sender, instance, **kwargs):
+    # Vendors lose a deleted career through SET NULL, which sends no signals
+    stats.refresh_vendors(stats.vendors_counted_under(career_id=instance.id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def refresh_category_stats(sender, instance, **kwargs):
+    vendor_ids = set(stats.vendors_counted_under(category_id=instance.id))
+    if instance.career_id is not None:
+        vendor_ids.update(
+            Vendor.objects.filter(career_id=instance.career_id).values_list('id', flat=True))
+    stats.refresh_vendors(vendor_ids)
+
+
+@receiver(post_delete, sender=Institution)
+def refresh_institution_stats(sender, instance, **kwargs):
+    stats.refresh_vendors(stats.vendors_counted_under(institution_id=instance.id))
@@ -0,0 +1,194 @@
+"""
+Materialized marketplace statistics.
+
+StatCount holds one row per (dimension, key): vendors per career,
+category, institution, city and sector (from the vendor's primary
+address) and customer signups per day. Signal handlers in
+services.signals keep the rows current with deltas written in the same
+transaction as the change that caused them, so the statistics API reads
+a handful of rows instead of grouping the marketplace tables.
+
+Each vendor's keys are recorded in VendorStatSnapshot. Refreshing a
+vendor compares its current keys with the snapshot and applies only the
+difference, which makes indirect changes (a new primary address, a career
+moving institution, a deleted category) as cheap as direct ones. Writes
+that bypass signals, such as queryset.update() and bulk_create(), are
+reconciled by rebuild(), run by the rebuild_stats command.
+"""
+from collections import Counter
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Address, Customer, StatCount, Vendor, VendorStatSnapshot
+
+CAREER = 'career'
+CATEGORY = 'category'
+INSTITUTION = 'institution'
+CITY = 'city'
+SECTOR = 'sector'
+SIGNUPS = 'signups'
+DIMENSIONS = (CAREER, CATEGORY, INSTITUTION, CITY, SECTOR, SIGNUPS)
+
+SNAPSHOT_FIELDS = ('career_id', 'category_id', 'institution_id', 'city', 'sector')
+
+UPSERT_SQL = (
+    f'INSERT INTO {StatCount._meta.db_table} (dimension, key, count) VALUES (%s, %s, %s) '
+    f'ON CONFLICT (dimension, key) DO UPDATE '
+    f'SET count = {StatCount._meta.db_table}.count + EXCLUDED.count'
+)
+
+
+def apply(deltas):
+    """
+    Add a Counter of {(dimension, key): delta} to StatCount. Rows are
+    written in key order so concurrent writers lock them in the same order.
+    """
+    rows = [(dimension, key, delta) for (dimension, key), delta in sorted(deltas.items()) if delta]
+    if rows:
+        with connection.cursor() as cursor:
+            cursor.executemany(UPSERT_SQL, rows)
+
+
+def vendor_rows(vendors):
+    """
+    (vendor id, career id, category id, institution id, city, sector) of
+    each vendor in the queryset, with city and sector normalized.
+    """
+    # Each subquery is a lookup on the one-primary-address unique index
+    primary = Address.objects.filter(owner=OuterRef('customer_id'), is_primary=True)
+    rows = vendors.annotate(
+        primary_city=Subquery(primary.values('city')),
+        primary_sector=Subquery(primary.values('sector')),
+    ).values_list(
+        'id',
+        'career_id',
+        'career__categorical_name__id',
+        'career__institution_id',
+        'primary_city',
+        'primary_sector',
+    )
+    for vendor_id, career_id, category_id, institution_id, city, sector in rows.iterator():
+        yield (vendor_id, career_id, category_id, institution_id,
+               ' '.join((city or '').split()), ' '.join((sector or '').split()))
+
+
+def vendor_keys(snapshot):
+    career_id, category_id, institution_id, city, sector = snapshot
+    keys = [
+        (dimension, str(value))
+        for dimension, value in ((CAREER, career_id), (CATEGORY, category_id),
+                                 (INSTITUTION, institution_id))
+        if value is not None
+    ]
+    if city:
+        keys.append((CITY, city))
+    if sector:
+        keys.append((SECTOR, f'{city}, {sector}' if city else sector))
+    return keys
+
+
+def refresh_vendors(vendor_ids):
+    """
+    Bring the statistics of the given vendors up to date, including
+    vendors that were deleted.
+    """
+    vendor_ids = sorted(set(vendor_ids))
+    if not vendor_ids:
+        return
+    with transaction.atomic():
+        # Serializes refreshes of the same vendors
+        list(Vendor.objects.select_for_update().filter(id__in=vendor_ids)
+             .order_by('id').values_list('id', flat=True))
+        snapshots = {
+            row[0]: row[1:] for row in
+            VendorStatSnapshot.objects.select_for_update().filter(vendor_id__in=vendor_ids)
+            .order_by('vendor_id').values_list('vendor_id', *SNAPSHOT_FIELDS)
+        }
+        current = {row[0]: row[1:] for row in vendor_rows(Vendor.objects.filter(id__in=vendor_ids))}
+
+        deltas = Counter()
+        created, removed = [], []
+        for vendor_id in vendor_ids:
+            old, new = snapshots.get(vendor_id), current.get(vendor_id)
+            if old == new:
+                continue
+            if old is not None:
+                deltas.subtract(vendor_keys(old))
+            if new is None:
+                removed.append(vendor_id)
+                continue
+            deltas.update(vendor_keys(new))
+            snapshot = dict(zip(SNAPSHOT_FIELDS, new))
+            if old is None:
+                created.append(VendorStatSnapshot(vendor_id=vendor_id, **snapshot))
+            else:
+                VendorStatSnapshot.objects.filter(vendor_id=vendor_id).update(**snapshot)
+
+        VendorStatSnapshot.objects.filter(vendor_id__in=removed).delete()
+        VendorStatSnapshot.objects.bulk_create(created)
+        apply(deltas)
+
+
+def vendors_counted_under(**snapshot_fields):
+    """
+    Ids of vendors whose snapshot matches, e.g. career_id=3; used when the
+    object they were counted under is gone.
+    """
+    return VendorStatSnapshot.objects.filter(**snapshot_fields).values_list('vendor_id', flat=True)
+
+
+def signup_day(customer):
+    return timezone.localtime(customer.registered_at).date().isoformat()
+
+
+def count_signup(customer, delta):
+    apply(Counter({(SIGNUPS, signup_day(customer)): delta}))
+
+
+def compute():
+    """
+    Statistics and vendor snapshots computed from scratch.
+    """
+    counts = Counter()
+    snapshots = []
+    for vendor_id, *snapshot in vendor_rows(Vendor.objects.order_by('id')):
+        counts.update(vendor_keys(snapshot))
+        snapshots.append(VendorStatSnapshot(vendor_id=vendor_id, **dict(zip(SNAPSHOT_FIELDS, snapshot))))
+    signups = (
+        Customer.objects.annotate(day=TruncDate('registered_at'))
+        .values('day').annotate(n=Count('id')).values_list('day', 'n')
+    )
+    for day, n in signups:
+        counts[(SIGNUPS, day.isoformat())] = n
+    return counts, snapshots
+
+
+def rebuild():
+    """
+    Recompute every statistic and vendor snapshot and correct the stored
+    ones. The tables are locked meanwhile, so signal handlers wait rather
+    than apply deltas against a half-rebuilt state. Returns the Counter of
+    corrections applied.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'LOCK TABLE {StatCount._meta.db_table}, {VendorStatSnapshot._meta.db_table} '
+            f'IN EXCLUSIVE MODE'
+        )
+        counts, snapshots = compute()
+        stored = Counter({
+            (dimension, key): count for dimension, key, count in
+            StatCount.objects.values_list('dimension', 'key', 'count')
+        })
+        drift = Counter({
+            key: counts[key] - stored[key]
+            for key in counts.keys() | stored.keys()
+            if counts[key] != stored[key]
+        })
+        apply(drift)
+        StatCount.objects.filter(count=0).delete()
+        VendorStatSnapshot.objects.all().delete()
+        VendorStatSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+    return drift
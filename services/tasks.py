@@ -1,20 +1,70 @@
-import json
-import googlemaps
-from celery import shared_task
+import os
+
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 
-from .models import Address
+from .models import Address, GeocodeOutbox
+from contratista_be import partitioning
 from contratista_be.celery_app import app
 
 @app.task(bind=True, default_retry_delay=60,
             retry_kwargs={'max_retries': 5})
 def enqueue_address(self, instance_id):
+    import googlemaps
     gmaps = googlemaps.Client(key=settings.GOOGLEMAPS_SECRET_KEY)
     try:
         query = Address.objects.filter(pk=instance_id)
         address_obj = query.get(pk=instance_id)
         geocode_result = gmaps.geocode(address_obj.formatted_name)
-        latlng = json.dumps(geocode_result[0]['geometry']['location'])
-        query.update(latlng=latlng)
+        location = geocode_result[0]['geometry']['location']
+        query.update(latitude=location['lat'], longitude=location['lng'])
     except:
         self.retry()
+
+
+@app.task
+def relay_geocode_outbox(batch_size=None):
+    """
+    Publish pending GeocodeOutbox rows to the broker and mark them
+    dispatched. Rows are locked with SKIP LOCKED so several relays can
+    run concurrently without publishing the same row twice; several
+    pending rows for one address collapse into a single geocode job.
+    Returns the number of rows dispatched.
+    """
+    batch_size = batch_size or settings.GEOCODE_OUTBOX_BATCH_SIZE
+    with transaction.atomic():
+        pending = list(
+            GeocodeOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(dispatched_at__isnull=True)
+            .order_by('id')
+            .values_list('id', 'address_id')[:batch_size]
+        )
+        if not pending:
+            return 0
+        address_ids = list(dict.fromkeys(a_id for _, a_id in pending))
+        with app.producer_or_acquire() as producer:
+            for address_id in address_ids:
+                enqueue_address.apply_async((address_id,), producer=producer)
+        GeocodeOutbox.objects.filter(
+            pk__in=[pk for pk, _ in pending]
+        ).update(dispatched_at=timezone.now())
+    return len(pending)
+
+
+@app.task
+def maintain_partitions(ahead=3):
+    """
+    Create the coming months' partitions of settings.PARTITIONED_TABLES
+    and archive and drop expired ones; see contratista_be.partitioning.
+    Returns the actions taken per table.
+    """
+    archive_dir = settings.PARTITION_ARCHIVE_DIR
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+    now = timezone.now()
+    return {
+        table: partitioning.maintain(table, now, ahead=ahead, archive_dir=archive_dir)
+        for table in sorted(settings.PARTITIONED_TABLES)
+    }
@@ -0,0 +1,122 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from contratista_be.tests.factories import create_company, create_vendor
+from services.models import Career, Company, Vendor
+
+
+class CompanyMemberCountTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.small = create_company('101000001', 'Small Builders')
+        cls.big = create_company('101000002', 'Big Builders')
+
+    def test_counter_follows_membership(self):
+        vendor = create_vendor('a@builders.com', company=self.small)
+        create_vendor('b@builders.com', company=self.big)
+        self.small.refresh_from_db()
+        self.assertEqual(self.small.member_count, 1)
+
+        vendor = Vendor.objects.get(pk=vendor.pk)
+        vendor.company = self.big
+        vendor.save()
+        vendor.save()
+        self.assertEqual(
+            list(Company.objects.order_by('id').values_list('member_count', flat=True)),
+            [0, 2]
+        )
+
+        vendor.delete()
+        self.big.refresh_from_db()
+        self.assertEqual(self.big.member_count, 1)
+
+    def test_saving_company_keeps_counter(self):
+        stale = Company.objects.get(pk=self.small.pk)
+        create_vendor('a@builders.com', company=self.small)
+        stale.name = 'Small Builders SRL'
+        stale.save()
+        self.small.refresh_from_db()
+        self.assertEqual(self.small.member_count, 1)
+
+    def test_saving_deleted_company_inserts_it(self):
+        company = Company.objects.get(pk=self.small.pk)
+        Company.objects.filter(pk=company.pk).delete()
+        company.save()
+        self.assertTrue(Company.objects.filter(pk=company.pk, name='Small Builders').exists())
+
+    def test_vendor_loaded_without_company_is_not_recounted(self):
+        vendor = create_vendor('a@builders.com', company=self.small)
+        vendor = Vendor.objects.only('career').get(pk=vendor.pk)
+        vendor.save()
+        self.small.refresh_from_db()
+        self.assertEqual(self.small.member_count, 1)
+
+    def test_refresh_member_counts(self):
+        create_vendor('a@builders.com', company=self.small)
+        Company.objects.update(member_count=7)
+        Company.objects.refresh_member_counts()
+        self.assertEqual(
+            list(Company.objects.order_by('id').values_list('member_count', flat=True)),
+            [1, 0]
+        )
+
+
+class CompanyAPITests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.plumber = Career.objects.create(industry='Plumbing', trade_name='Plumber')
+        cls.mason = Career.objects.create(industry='Masonry', trade_name='Mason')
+        cls.small = create_company('101000001', 'Small Builders')
+        cls.big = create_company('101000002', 'Big Builders')
+        create_vendor('solo@builders.com', company=cls.small, career=cls.mason)
+        cls.first = create_vendor(
+            'a@builders.com', company=cls.big, career=cls.plumber, latlng=(18.47, -69.93))
+        create_vendor(
+            'b@builders.com', company=cls.big, career=cls.plumber, latlng=(19.45, -70.69))
+        create_vendor('c@builders.com', company=cls.big, career=cls.mason)
+
+    def test_list_sorts_by_member_count(self):
+        response = self.client.get(reverse('company-list'))
+        self.assertEqual(
+            [(c['name'], c['member_count']) for c in response.json()['results']],
+            [('Big Builders', 3), ('Small Builders', 1)]
+        )
+        response = self.client.get(reverse('company-list'), {'ordering': 'member_count'})
+        self.assertEqual(response.json()['results'][0]['name'], 'Small Builders')
+
+    def test_detail_aggregates_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('company-detail', args=[self.big.pk]))
+        data = response.json()
+        self.assertEqual(data['member_count'], 3)
+        self.assertEqual(data['careers'], ['Mason', 'Plumber'])
+        self.assertEqual(
+            data['service_area'],
+            {'south': 18.47, 'west': -70.69, 'north': 19.45, 'east': -69.93}
+        )
+
+    def test_detail_without_members(self):
+        empty = create_company('101000003', 'Empty Builders')
+        data = self.client.get(reverse('company-detail', args=[empty.pk])).json()
+        self.assertEqual(data['member_count'], 0)
+        self.assertEqual(data['careers'], [])
+        self.assertIsNone(data['service_area'])
+
+    def test_roster(self):
+        url = reverse('company-members', args=[self.big.pk])
+        # Company lookup, count and page
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        roster = response.json()['results']
+        self.assertEqual(len(roster), 3)
+        self.assertEqual(roster[0], {
+            'id': self.first.pk,
+            'display_name': 'a Vendor',
+            'career': 'Plumber',
+            'address': self.first.customer.addresses.get().formatted_name,
+            'latitude': 18.47,
+            'longitude': -69.93,
+        })
+        self.assertIsNone(roster[2]['address'])
@@ -0,0 +1,20 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+
+class ProfileImportsTests(SimpleTestCase):
+
+    def profile(self, *args):
+        out = StringIO()
+        call_command('profile_imports', *args, '--limit', '100000', stdout=out)
+        return [line.split()[-1] for line in out.getvalue().splitlines()[1:-1]]
+
+    def test_startup_skips_heavy_clients(self):
+        modules = self.profile()
+        self.assertIn('django', modules)
+        for heavy in ('celery', 'googlemaps', 'numpy'):
+            self.assertNotIn(heavy, modules)
+
+    def test_extra_modules_are_profiled(self):
+        self.assertIn('celery', self.profile('services.tasks'))
@@ -0,0 +1,114 @@
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from contratista_be.tests.factories import create_customer
+from services import dedup
+from services.models import Address
+
+
+class NormalizationTests(SimpleTestCase):
+
+    def test_phones(self):
+        for phone in ('(809) 555-1234', '809.555.1234', '+1 809 555 1234'):
+            self.assertEqual(dedup.normalize_phone(phone), '8095551234')
+        self.assertEqual(dedup.normalize_phone(None), '')
+        # Full-width digits are not phone digits
+        self.assertEqual(dedup.normalize_phone('８０９ 555-1234'), '5551234')
+
+    def test_address_key_ignores_case_accents_order_and_abbreviations(self):
+        self.assertEqual(
+            dedup.address_key('C/ Máximo Gómez No. 5, Gazcue'),
+            dedup.address_key('gazcue, calle maximo gomez numero 5'),
+        )
+
+
+class DeduplicatorTests(SimpleTestCase):
+
+    def test_address_clusters(self):
+        addresses = [
+            'Calle Duarte No. 5, Naco, Santo Domingo, Dominican Republic',
+            'C/ Duarte #5, Naco, Santo Domingo, Dominican Republic',
+            'Calle Duartte 5, Naco, Santo Domingo, Dominican Republic',
+            'Calle Duarte 7, Naco, Santo Domingo, Dominican Republic',
+            'Calle Mella 5, Naco, Santo Domingo, Dominican Republic',
+            'Calle Duarte 5, Gurabo, Santiago, Dominican Republic',
+        ]
+        clusters = dedup.AddressDeduplicator().clusters(
+            (i, {'formatted_name': name}) for i, name in enumerate(addresses))
+        self.assertEqual(clusters, [[0, 1, 2]])
+
+    def test_customer_clusters(self):
+        customers = [
+            ('Juan', 'Pérez', '809-555-1234', ''),
+            ('juan', 'perez', '+1 (809) 555 1234', ''),
+            ('Maria', 'Perez', '8095551234', ''),
+            ('Juan', 'Perez', '8295550000', '809 555 1234'),
+            ('Juan', 'Perez', '8495559999', ''),
+        ]
+        clusters = dedup.CustomerDeduplicator().clusters(
+            (i, dict(zip(('first_name', 'last_name', 'primary_phone', 'secondary_phone'), c)))
+            for i, c in enumerate(customers)
+        )
+        self.assertEqual(clusters, [[0, 1, 3]])
+
+    def test_large_blocks_are_split_not_cut(self):
+        # A partner company's staff all listing its switchboard number
+        names = ['Ana', 'Luis', 'Rosa', 'Pedro', 'Carmen', 'Jose', 'Elena', 'Miguel',
+                 'Sofia', 'Rafael', 'Lucia', 'Tomas']
+        surnames = ['Abreu', 'Batista', 'Castillo', 'Diaz', 'Espinal', 'Fermin',
+                    'Guzman', 'Hernandez', 'Isidor', 'Jimenez']
+        customers = [
+            (i, {'first_name': first, 'last_name': last, 'primary_phone': '809-555-0000'})
+            for i, (first, last) in enumerate(
+                (first, last) for last in surnames for first in names)
+        ]
+        repeat = dict(customers[100][1], primary_phone='+1 (809) 555 0000')
+        clusters = dedup.CustomerDeduplicator(0.9).clusters(customers + [(120, repeat)])
+        self.assertEqual(clusters, [[100, 120]])
+
+
+class ExistingDuplicateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = create_customer('juan@findme.com')
+        cls.address = Address.objects.create(
+            full_name='Juan',
+            address_line_one='Calle Duarte No. 5',
+            sector='Naco',
+            phone_number='5555555555',
+            owner=cls.customer
+        )
+
+    def test_keys_are_stored(self):
+        self.assertEqual(self.customer.phone_key, '5555555555')
+        self.assertEqual(self.address.name_key, dedup.address_key(self.address.formatted_name))
+
+    def test_find_existing_customers(self):
+        record = {'first_name': 'Juan', 'last_name': 'Vendor', 'primary_phone': '+1 555 555 5555'}
+        self.assertEqual(dedup.find_existing_customers(record), [self.customer.pk])
+        record['first_name'] = 'Pedro'
+        self.assertEqual(dedup.find_existing_customers(record), [])
+
+    def test_find_existing_addresses(self):
+        record = {'formatted_name': 'c/ duarte no 5, naco, , , Dominican Republic'}
+        self.assertEqual(dedup.find_existing_addresses(record), [self.address.pk])
+        self.assertEqual(dedup.find_existing_addresses(record, owner=create_customer('x@y.com')), [])
+
+    def test_command_checks_import_file_against_stored_rows(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('formatted_name\n'
+                    '"Calle Duarte 5, Naco, Dominican Republic"\n'
+                    '"Calle Mella 9, Naco, Dominican Republic"\n'
+                    '"Calle Mella #9, Naco, Dominican Republic"\n')
+        self.addCleanup(os.remove, f.name)
+        out = StringIO()
+        call_command('find_duplicates', 'addresses', '--file', f.name, '--against-db',
+                     stdout=out, stderr=StringIO())
+        self.assertEqual(out.getvalue().splitlines(), [
+            f'id:{self.address.pk} line:2',
+            'line:3 line:4',
+        ])
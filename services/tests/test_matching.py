@@ -0,0 +1,129 @@
+from django.conf import settings
+from django.db import transaction
+from django.test import SimpleTestCase, TransactionTestCase
+
+from accounts.models import User
+from services import matching
+from services.matching import VendorIndex
+from services.models import Address, Career, Category, Customer, Vendor
+
+SANTO_DOMINGO = (18.4861, -69.9312)
+SANTIAGO = (19.4517, -70.6970)
+BOCA_CHICA = (18.4500, -69.6000)
+
+
+class VendorIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = VendorIndex(capacity=2)
+        self.index.extend([
+            (1, 10, *SANTIAGO),
+            (2, 10, *SANTO_DOMINGO),
+            (3, 20, *SANTO_DOMINGO),
+            (4, 10, *BOCA_CHICA),
+        ])
+
+    def test_nearest_ranks_by_distance_within_category(self):
+        ranked = self.index.nearest(10, *SANTO_DOMINGO)
+        self.assertEqual([vendor_id for vendor_id, _ in ranked], [2, 4, 1])
+        self.assertAlmostEqual(ranked[0][1], 0, places=2)
+        self.assertAlmostEqual(ranked[1][1], 35.3, places=0)
+
+    def test_nearest_limit_and_radius(self):
+        self.assertEqual(
+            [v for v, _ in self.index.nearest(10, *SANTO_DOMINGO, limit=2)],
+            [2, 4]
+        )
+        self.assertEqual(
+            [v for v, _ in self.index.nearest(10, *SANTO_DOMINGO, radius_km=10)],
+            [2]
+        )
+        self.assertEqual(self.index.nearest(99, *SANTO_DOMINGO), [])
+
+    def test_upsert_moves_vendor(self):
+        self.index.upsert(1, 10, *SANTO_DOMINGO)
+        self.index.upsert(3, 10, *SANTIAGO)
+        self.assertEqual(len(self.index), 4)
+        ranked = [v for v, _ in self.index.nearest(10, *SANTIAGO)]
+        self.assertEqual(ranked[0], 3)
+        self.assertEqual(sorted(ranked[1:3]), [1, 2])
+        self.assertEqual(self.index.nearest(20, *SANTO_DOMINGO), [])
+
+    def test_remove_keeps_remaining_rows(self):
+        self.index.remove(1)
+        self.index.remove(1)
+        self.assertNotIn(1, self.index)
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(
+            [v for v, _ in self.index.nearest(10, *SANTIAGO)], [2, 4])
+        self.assertEqual(
+            [v for v, _ in self.index.nearest(20, *SANTIAGO)], [3])
+
+
+class VendorIndexSyncTests(TransactionTestCase):
+    # Index refreshes run on commit, which TestCase never reaches
+
+    def setUp(self):
+        self.career = Career.objects.create(industry='Construction', trade_name='Plumber')
+        self.category = Category.objects.create(
+            name='Plumbing', description='Pipes and water', career=self.career)
+        user = User.objects.create_user(email='mario@pipes.com', password='testpassword')
+        self.customer = Customer.objects.create(
+            first_name='Mario', last_name='Mario', primary_phone='5555555555', user=user)
+        address = Address.objects.create(
+            full_name='Shop', address_line_one='c/ Hatuey',
+            phone_number='5555555555', owner=self.customer)
+        Address.objects.filter(pk=address.pk).update(
+            is_primary=True, latitude=SANTO_DOMINGO[0], longitude=SANTO_DOMINGO[1])
+        matching.reset_vendor_index()
+        self.addCleanup(matching.reset_vendor_index)
+
+    def test_index_is_built_from_database(self):
+        vendor = Vendor.objects.create(career=self.career, customer=self.customer)
+        ranked = matching.get_vendor_index().nearest(self.category.id, *SANTIAGO)
+        self.assertEqual([v for v, _ in ranked], [vendor.id])
+
+    def test_signals_keep_index_current(self):
+        index = matching.get_vendor_index()
+        self.assertEqual(len(index), 0)
+
+        vendor = Vendor.objects.create(career=self.career, customer=self.customer)
+        self.assertIn(vendor.id, index)
+
+        vendor.career = None
+        vendor.save()
+        self.assertEqual(index.nearest(self.category.id, *SANTIAGO), [])
+
+        vendor.delete()
+        self.assertNotIn(vendor.id, index)
+
+    def test_rolled_back_writes_do_not_reach_index(self):
+        index = matching.get_vendor_index()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Vendor.objects.create(career=self.career, customer=self.customer)
+            raise RuntimeError
+        self.assertEqual(len(index), 0)
+
+    def test_category_changes_refresh_previous_vendors(self):
+        vendor = Vendor.objects.create(career=self.career, customer=self.customer)
+        index = matching.get_vendor_index()
+        self.category.career = Career.objects.create(industry='Masonry', trade_name='Mason')
+        self.category.save()
+        self.assertEqual(index.nearest(self.category.id, *SANTIAGO), [])
+
+        self.category.career = self.career
+        self.category.save()
+        self.assertEqual([v for v, _ in index.nearest(self.category.id, *SANTIAGO)], [vendor.id])
+        self.career.delete()
+        self.assertEqual(index.in_category(self.category.id), [])
+        self.assertIn(vendor.id, index)
+
+    def test_stale_index_is_replaced_in_background(self):
+        index = matching.get_vendor_index()
+        vendor = Vendor.objects.create(career=self.career, customer=self.customer)
+        index.built_at -= settings.VENDOR_INDEX_MAX_AGE + 1
+        self.assertIs(matching.get_vendor_index(), index)
+        matching._rebuild_thread.join()
+        rebuilt = matching.get_vendor_index()
+        self.assertIsNot(rebuilt, index)
+        self.assertIn(vendor.id, rebuilt)
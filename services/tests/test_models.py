@@ -4,6 +4,7 @@ from shutil import rmtree
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 from unittest.mock import patch
 
@@ -14,11 +15,14 @@ from services.models import (
     Category,
     Company,
     Customer,
+    GeocodeOutbox,
     Institution,
     Job,
     NationalId,
     Vendor,
 )
+from services import national_ids
+from services.tasks import enqueue_address, relay_geocode_outbox
 
 TEST_IMAGE_PATH = os.path.join(
     settings.BASE_DIR, 'services/static/img/awesomeface.jpg')
@@ -196,3 +200,195 @@ class AddressModelTests(TestCase):
             address.formatted_name
         )
 
+    @patch('googlemaps.Client.geocode')
+    def test_geocode_result_is_stored_as_coordinates(self, mock_geocode):
+        mock_geocode.return_value = [
+            {'geometry': {'location': {'lat': 18.4676, 'lng': -69.9274}}}
+        ]
+        address = Address.objects.create(
+            full_name='My first address',
+            address_line_one='c/ Hatuey, no. 102',
+            phone_number='5555555555',
+            owner=self.customer
+        )
+        enqueue_address(address.id)
+        address.refresh_from_db()
+        self.assertEqual(address.latitude, 18.4676)
+        self.assertEqual(address.longitude, -69.9274)
+        self.assertEqual(address.latlng, {'lat': 18.4676, 'lng': -69.9274})
+
+    def test_latlng_accepts_legacy_json(self):
+        address = Address(latlng='{"lat": 18.5, "lng": -69.9}')
+        self.assertEqual((address.latitude, address.longitude), (18.5, -69.9))
+        address.latlng = None
+        self.assertIsNone(address.latlng)
+
+    def test_within_bounds(self):
+        inside = Address.objects.create(
+            full_name='Inside',
+            address_line_one='c/ Hatuey',
+            phone_number='5555555555',
+            owner=self.customer
+        )
+        outside = Address.objects.create(
+            full_name='Outside',
+            address_line_one='c/ Duarte',
+            phone_number='5555555555',
+            owner=self.customer
+        )
+        Address.objects.filter(pk=inside.pk).update(latitude=18.47, longitude=-69.93)
+        Address.objects.filter(pk=outside.pk).update(latitude=19.45, longitude=-70.69)
+        self.assertEqual(
+            list(Address.objects.within_bounds(18.4, -70.0, 18.6, -69.8)),
+            [inside]
+        )
+
+
+class GeocodeOutboxTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(
+                            email='waldo@findme.com',
+                            password='testpassword'
+                        )
+        cls.customer = Customer.objects.create(
+            first_name='Waldo',
+            last_name='The Unfindable',
+            display_name='waldo',
+            primary_phone='5555555555',
+            user=user
+        )
+
+    def create_address(self, **kwargs):
+        return Address.objects.create(
+            full_name='My first address',
+            state_province_region='Santo Domingo',
+            city='DN',
+            sector='Los Cacicazgos',
+            address_line_one=kwargs.pop('address_line_one', 'c/ Hatuey'),
+            phone_number='5555555555',
+            owner=self.customer,
+            **kwargs
+        )
+
+    def test_address_creation_writes_outbox_row(self):
+        address = self.create_address()
+        self.assertEqual(
+            list(GeocodeOutbox.objects.values_list('address_id', flat=True)),
+            [address.id]
+        )
+
+    def test_only_address_changes_write_outbox_rows(self):
+        address = self.create_address()
+        address.full_name = 'Home'
+        address.save()
+        self.assertEqual(GeocodeOutbox.objects.count(), 1)
+
+        reloaded = Address.objects.get(pk=address.pk)
+        reloaded.save()
+        self.assertEqual(GeocodeOutbox.objects.count(), 1)
+
+        reloaded.address_line_one = 'c/ Hatuey, no. 102'
+        reloaded.save()
+        self.assertEqual(GeocodeOutbox.objects.count(), 2)
+
+    def test_rolled_back_address_leaves_no_outbox_row(self):
+        try:
+            with transaction.atomic():
+                self.create_address()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(GeocodeOutbox.objects.exists())
+
+    @patch('services.tasks.app.producer_or_acquire')
+    @patch('services.tasks.enqueue_address.apply_async')
+    def test_relay_publishes_each_address_once(self, mock_apply, mock_producer):
+        first = self.create_address()
+        second = self.create_address(address_line_one='c/ Duarte')
+        first.address_line_one = 'c/ Hatuey, no. 102'
+        first.save()
+
+        self.assertEqual(relay_geocode_outbox(), 3)
+        published = [c[0][0] for c in mock_apply.call_args_list]
+        self.assertEqual(published, [(first.id,), (second.id,)])
+        self.assertFalse(
+            GeocodeOutbox.objects.filter(dispatched_at__isnull=True).exists())
+
+        self.assertEqual(relay_geocode_outbox(), 0)
+        self.assertEqual(mock_apply.call_count, 2)
+
+
+class NationalIdModelTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        customers = []
+        for name in ('waldo', 'wilma'):
+            user = User.objects.create_user(
+                email=f'{name}@findme.com', password='testpassword')
+            customers.append(Customer.objects.create(
+                first_name=name, last_name='Finder', primary_phone='5555555555', user=user))
+        cls.waldo, cls.wilma = customers
+
+    def test_canonical_number_and_formatting(self):
+        national_id = NationalId.objects.create(
+            id_number='001-1391825-4', owner=self.waldo)
+        self.assertEqual(national_id.id_number_canonical, '00113918254')
+        self.assertEqual(str(national_id), '001-1391825-4')
+
+        ssn = NationalId(id_type=NationalId.SSN, id_number='123 45 6789')
+        self.assertEqual(str(ssn), '123-45-6789')
+
+    def test_invalid_check_digit_is_rejected(self):
+        national_id = NationalId(id_number='001-1391825-5', owner=self.waldo)
+        self.assertRaises(ValidationError, national_id.save)
+
+    def test_same_number_cannot_be_registered_twice(self):
+        NationalId.objects.create(id_number='00113918254', owner=self.waldo)
+        duplicate = NationalId(id_number='001 1391825 4', owner=self.wilma)
+        self.assertRaises(ValidationError, duplicate.save)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            NationalId.objects.bulk_create([
+                NationalId(id_number='001 1391825 4',
+                           id_number_canonical='00113918254', owner=self.wilma)
+            ])
+
+    def test_non_ascii_digits_are_not_digits(self):
+        NationalId.objects.create(id_number='00113918254', owner=self.waldo)
+        self.assertEqual(national_ids.normalize(NationalId.CEDULA, '００１-1391825-4'), '13918254')
+        self.assertFalse(national_ids.is_valid(NationalId.CEDULA, '００１13918254'))
+        full_width = NationalId(id_number='００１-1391825-4', owner=self.wilma)
+        self.assertRaises(ValidationError, full_width.save)
+
+        canonical, valid = national_ids.validate_many(
+            NationalId.CEDULA, ['００１-1391825-4', '001-1391825-4'])
+        self.assertEqual(valid.tolist(), [False, True])
+
+    def test_lookup_and_existing(self):
+        national_id = NationalId.objects.create(
+            id_type=NationalId.PASSPORT, id_number='rd12345', owner=self.waldo)
+        self.assertEqual(
+            NationalId.objects.lookup(NationalId.PASSPORT, 'RD-12345').get(),
+            national_id
+        )
+        self.assertFalse(NationalId.objects.lookup(NationalId.CEDULA, 'RD12345').exists())
+        self.assertEqual(
+            NationalId.objects.existing(NationalId.PASSPORT, ['Rd 12345', 'XX99999']),
+            {'RD12345'}
+        )
+
+    def test_validate_many(self):
+        numbers = ['001-1391825-4', '40222222222', '00113918255', '123', '', '0010000001-7']
+        canonical, valid = national_ids.validate_many(NationalId.CEDULA, numbers)
+        self.assertEqual(canonical[0], '00113918254')
+        self.assertEqual(valid.tolist(), [True, True, False, False, False, True])
+        self.assertEqual(
+            valid.tolist(),
+            [national_ids.is_valid(NationalId.CEDULA, c) for c in canonical]
+        )
+
+        canonical, valid = national_ids.validate_many(
+            NationalId.SSN, ['123-45-6789', '000-12-3456', '987-65-4321'])
+        self.assertEqual(valid.tolist(), [True, False, False])
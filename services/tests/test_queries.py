@@ -0,0 +1,172 @@
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from contratista_be import partitioning
+from services.models import (
+    Address,
+    Category,
+    Company,
+    Customer,
+    GeocodeOutbox,
+    NationalId,
+)
+
+SEED_ROWS = 3000
+
+
+def scanned_relations(queryset):
+    """
+    Return (node type, relation name) pairs for the scans EXPLAIN plans
+    when running the queryset.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0][0]['Plan']
+    scans, nodes = [], [plan]
+    while nodes:
+        node = nodes.pop()
+        if 'Relation Name' in node:
+            scans.append((node['Node Type'], node['Relation Name']))
+        nodes.extend(node.get('Plans', ()))
+    return scans
+
+
+def is_empty(relation):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT NOT EXISTS (SELECT 1 FROM "{relation}")')
+        return cursor.fetchone()[0]
+
+
+def sequential_scans(queryset):
+    """
+    Return the names of the relations EXPLAIN plans a sequential scan
+    over when running the queryset. Scanning the catch-all default
+    partition of a partitioned table is free while it is empty, as it is
+    when maintain_partitions keeps up, so it is only reported once rows
+    land in it.
+    """
+    return [
+        relation for node_type, relation in scanned_relations(queryset)
+        if node_type == 'Seq Scan'
+        and not (relation.endswith('_default') and is_empty(relation))
+    ]
+
+
+class HotQueryPlanTests(TestCase):
+    """
+    Seeds enough rows for the planner to prefer an index when one exists,
+    then fails if any of the hot lookups falls back to a sequential scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create(
+            User(email=f'user{i}@example.com', is_active=i % 100 != 0)
+            for i in range(SEED_ROWS)
+        )
+        customers = Customer.objects.bulk_create(
+            Customer(
+                first_name='First',
+                last_name=f'Last {i}',
+                display_name=f'customer {i}',
+                primary_phone=f'809555{i:04d}',
+                user=user
+            )
+            for i, user in enumerate(users)
+        )
+        Address.objects.bulk_create(
+            Address(
+                full_name='Home',
+                address_line_one=f'c/ {i}',
+                phone_number='8095555555',
+                is_primary=is_primary,
+                latitude=18 + i / SEED_ROWS,
+                longitude=-70 + i / SEED_ROWS,
+                owner=customer
+            )
+            for i, customer in enumerate(customers)
+            for is_primary in (True, False)
+        )
+        NationalId.objects.bulk_create(
+            NationalId(id_number=f'{i:011d}', id_number_canonical=f'{i:011d}',
+                       owner=customer)
+            for i, customer in enumerate(customers)
+        )
+        Company.objects.bulk_create(
+            Company(rnc=f'{i:09d}', name=f'Company {i}', slug=f'company-{i}')
+            for i in range(SEED_ROWS)
+        )
+        Category.objects.bulk_create(
+            Category(name=f'Category {i}', slug=f'category-{i}',
+                     description=f'Category number {i}')
+            for i in range(SEED_ROWS)
+        )
+        now = timezone.now()
+        GeocodeOutbox.objects.bulk_create(
+            GeocodeOutbox(address_id=address_id,
+                          dispatched_at=None if i < 10 else now)
+            for i, address_id in enumerate(
+                Address.objects.values_list('id', flat=True))
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.customer = customers[SEED_ROWS // 2]
+
+    def assertNoSequentialScan(self, queryset):
+        self.assertEqual(sequential_scans(queryset), [], queryset.query)
+
+    def test_primary_address_by_owner(self):
+        self.assertNoSequentialScan(
+            Address.objects.filter(owner=self.customer, is_primary=True))
+
+    def test_addresses_within_bounds(self):
+        self.assertNoSequentialScan(
+            Address.objects.within_bounds(18.1, -69.9, 18.11, -69.89))
+
+    def test_customers_by_registration_date(self):
+        self.assertNoSequentialScan(
+            Customer.objects.order_by('-registered_at')[:20])
+
+    def test_company_by_slug(self):
+        self.assertNoSequentialScan(Company.objects.filter(slug='company-42'))
+
+    def test_companies_by_member_count(self):
+        self.assertNoSequentialScan(
+            Company.objects.order_by('-member_count', 'id')[:20])
+
+    def test_category_by_slug(self):
+        self.assertNoSequentialScan(Category.objects.filter(slug='category-42'))
+
+    def test_national_id_by_type_and_number(self):
+        self.assertNoSequentialScan(
+            NationalId.objects
+            .lookup(NationalId.CEDULA, '000-0000004-2')
+            .values('owner_id')
+        )
+
+    def test_inactive_users(self):
+        self.assertNoSequentialScan(User.objects.filter(is_active=False))
+
+    def test_pending_outbox_rows(self):
+        self.assertNoSequentialScan(
+            GeocodeOutbox.objects.filter(dispatched_at__isnull=True)[:500])
+
+    def test_recent_outbox_rows_touch_one_partition(self):
+        start = partitioning.month_start(timezone.now())
+        recent = GeocodeOutbox.objects.filter(
+            created_at__gte=start, created_at__lt=partitioning.add_months(start, 1))
+        self.assertEqual(
+            {relation for _, relation in scanned_relations(recent)},
+            {partitioning.partition_name('services_geocodeoutbox', start)}
+        )
+
+    def test_one_primary_address_per_owner(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Address.objects.bulk_create([
+                Address(full_name='Office', address_line_one='c/ Duarte',
+                        phone_number='8095555555', is_primary=True,
+                        owner=self.customer)
+            ])
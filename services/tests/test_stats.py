@@ -0,0 +1,109 @@
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from contratista_be.tests.factories import create_customer, create_vendor
+from services import stats
+from services.models import (
+    Career,
+    Category,
+    Institution,
+    StatCount,
+    Vendor,
+)
+
+
+def counts(dimension):
+    return dict(
+        StatCount.objects.filter(dimension=dimension, count__gt=0).values_list('key', 'count'))
+
+
+class StatCountTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.institution = Institution.objects.create(short_name='INFOTEP', long_name='Infotep')
+        cls.plumber = Career.objects.create(
+            industry='Plumbing', trade_name='Plumber', institution=cls.institution)
+        cls.mason = Career.objects.create(industry='Masonry', trade_name='Mason')
+        cls.plumbing = Category.objects.create(
+            name='Plumbing', description='Pipes', career=cls.plumber)
+
+    def test_vendor_dimensions_follow_changes(self):
+        vendor = create_vendor(
+            'a@builders.com', career=self.plumber, city='Santo Domingo', sector=' Naco ')
+        create_vendor('b@builders.com', career=self.plumber, city='Santiago', sector='Gurabo')
+        self.assertEqual(counts(stats.CAREER), {str(self.plumber.pk): 2})
+        self.assertEqual(counts(stats.CATEGORY), {str(self.plumbing.pk): 2})
+        self.assertEqual(counts(stats.INSTITUTION), {str(self.institution.pk): 2})
+        self.assertEqual(counts(stats.SECTOR), {'Santo Domingo, Naco': 1, 'Santiago, Gurabo': 1})
+
+        vendor.career = self.mason
+        vendor.save()
+        address = vendor.customer.addresses.get()
+        address.city = 'Santiago'
+        address.save()
+        self.assertEqual(
+            counts(stats.CAREER), {str(self.plumber.pk): 1, str(self.mason.pk): 1})
+        self.assertEqual(counts(stats.CITY), {'Santiago': 2})
+
+        self.mason.institution = self.institution
+        self.mason.save()
+        self.assertEqual(counts(stats.INSTITUTION), {str(self.institution.pk): 2})
+
+        self.plumber.delete()
+        self.assertEqual(counts(stats.CAREER), {str(self.mason.pk): 1})
+        self.assertEqual(counts(stats.CATEGORY), {})
+
+        vendor.delete()
+        self.assertEqual(counts(stats.CITY), {'Santiago': 1})
+        self.assertEqual(counts(stats.INSTITUTION), {})
+
+    def test_signups_per_day(self):
+        create_customer('a@builders.com')
+        customer = create_customer('b@builders.com')
+        today = timezone.localdate().isoformat()
+        self.assertEqual(counts(stats.SIGNUPS), {today: 2})
+        customer.delete()
+        self.assertEqual(counts(stats.SIGNUPS), {today: 1})
+
+    def test_rebuild_corrects_drift(self):
+        create_vendor('a@builders.com', career=self.plumber, city='Santiago')
+        vendor = create_vendor('b@builders.com', career=self.plumber)
+        expected = {d: counts(d) for d in stats.DIMENSIONS}
+        Vendor.objects.filter(pk=vendor.pk).update(career=self.mason)
+        StatCount.objects.filter(dimension=stats.CITY).update(count=7)
+        expected[stats.CAREER] = {str(self.plumber.pk): 1, str(self.mason.pk): 1}
+        expected[stats.INSTITUTION] = {str(self.institution.pk): 1}
+        expected[stats.CATEGORY] = {str(self.plumbing.pk): 1}
+
+        out = StringIO()
+        call_command('rebuild_stats', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Corrected 5 statistics')
+        self.assertEqual({d: counts(d) for d in stats.DIMENSIONS}, expected)
+        # Snapshots are rebuilt too, so later deltas apply cleanly
+        Vendor.objects.get(pk=vendor.pk).delete()
+        self.assertEqual(counts(stats.CAREER), {str(self.plumber.pk): 1})
+
+    def test_api(self):
+        create_vendor('a@builders.com', career=self.plumber)
+        create_vendor('b@builders.com', career=self.plumber)
+        create_vendor('c@builders.com', career=self.mason)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('stats-detail', args=[stats.CAREER]))
+        self.assertEqual(response.json()['results'], [
+            {'key': str(self.plumber.pk), 'label': 'Plumber', 'count': 2},
+            {'key': str(self.mason.pk), 'label': 'Mason', 'count': 1},
+        ])
+
+        today = timezone.localdate().isoformat()
+        response = self.client.get(reverse('stats-detail', args=[stats.SIGNUPS]), {'since': today})
+        self.assertEqual(
+            response.json()['results'], [{'key': today, 'label': today, 'count': 3}])
+        for params in ({'since': 'yesterday'}, {'until': '2026-02-30'}):
+            response = self.client.get(reverse('stats-detail', args=[stats.SIGNUPS]), params)
+            self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('stats-detail', args=['weather']))
+        self.assertEqual(response.status_code, 404)